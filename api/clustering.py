@@ -0,0 +1,120 @@
+"""
+Klastrowanie punktów per poziom powiększenia (siatka w pikselach Web Mercator)
+"""
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from api.spatial import GridIndex
+
+TILE_SIZE = 256
+
+
+@dataclass
+class Cluster:
+    """Klaster na jednym poziomie powiększenia"""
+    id: str
+    zoom: int
+    lat: float
+    lon: float
+    members: List[str]
+
+    def to_feature(self) -> dict:
+        return {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [self.lon, self.lat]},
+            "properties": {"cluster": True, "cluster_id": self.id, "count": len(self.members)},
+        }
+
+
+def world_pixel(lat: float, lon: float, zoom: int) -> Tuple[float, float]:
+    """Współrzędne w pikselach świata Web Mercator (jak kafelki Leaflet)"""
+    scale = TILE_SIZE * 2 ** zoom
+    lat = max(min(lat, 85.05112878), -85.05112878)
+    sin_lat = math.sin(math.radians(lat))
+    x = (lon + 180) / 360 * scale
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    return x, y
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) kafelka z/x/y"""
+    n = 2 ** zoom
+    def lat(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+    return lat(y + 1), x / n * 360 - 180, lat(y), (x + 1) / n * 360 - 180
+
+
+def in_tile(feature: dict, bounds: Tuple[float, float, float, float]) -> bool:
+    """Punkt na wspólnej krawędzi należy tylko do jednego kafelka"""
+    lon, lat = feature["geometry"]["coordinates"]
+    min_lat, min_lon, max_lat, max_lon = bounds
+    return min_lat < lat <= max_lat and min_lon <= lon < max_lon
+
+
+class ZoomClusters:
+    """
+    Klastry dla wszystkich poziomów 0..max_zoom liczone raz dla zbioru
+    features GeoJSON; identyfikatorem wydarzenia jest properties.link
+    """
+
+    def __init__(self, features: List[dict], radius: int = 60, max_zoom: int = 18):
+        """
+        Args:
+            features: GeoJSON Feature (Point)
+            radius: bok komórki klastra w pikselach ekranu
+            max_zoom: najwyższy poziom z klastrami (wyżej - jak max_zoom)
+        """
+        self.radius = radius
+        self.max_zoom = max_zoom
+        self.features: Dict[str, dict] = {}
+        self._points: Dict[str, Tuple[float, float]] = {}
+        for feature in features:
+            link = feature["properties"]["link"]
+            lon, lat = feature["geometry"]["coordinates"]
+            self.features[link] = feature
+            self._points[link] = (lat, lon)
+
+        self._clusters: Dict[str, Cluster] = {}
+        self._levels: List[GridIndex] = [self._build_level(zoom) for zoom in range(max_zoom + 1)]
+
+    def _cell(self, lat: float, lon: float, zoom: int) -> Tuple[int, int]:
+        x, y = world_pixel(lat, lon, zoom)
+        return int(x // self.radius), int(y // self.radius)
+
+    def _build_level(self, zoom: int) -> GridIndex:
+        cells = defaultdict(list)
+        for link, (lat, lon) in self._points.items():
+            cells[self._cell(lat, lon, zoom)].append(link)
+
+        index = GridIndex()
+        for (cx, cy), members in cells.items():
+            lat = sum(self._points[m][0] for m in members) / len(members)
+            lon = sum(self._points[m][1] for m in members) / len(members)
+            cluster = Cluster(id=f"{zoom}/{cx}/{cy}", zoom=zoom, lat=lat, lon=lon, members=members)
+            self._clusters[cluster.id] = cluster
+            index.insert(lat, lon, cluster)
+        return index
+
+    def query(self, zoom: int, min_lat: float, min_lon: float,
+              max_lat: float, max_lon: float) -> List[dict]:
+        """Klastry (i pojedyncze wydarzenia) w prostokącie na danym poziomie"""
+        level = self._levels[max(0, min(zoom, self.max_zoom))]
+        return [cluster.to_feature() if len(cluster.members) > 1 else self.features[cluster.members[0]]
+                for cluster in level.bbox(min_lat, min_lon, max_lat, max_lon)]
+
+    def get(self, cluster_id: str) -> Optional[Cluster]:
+        return self._clusters.get(cluster_id)
+
+    def expansion_zoom(self, cluster: Cluster) -> int:
+        """Najniższy poziom, na którym klaster się rozpada (max_zoom + 1, jeśli nigdy)"""
+        for zoom in range(cluster.zoom + 1, self.max_zoom + 1):
+            first = self._cell(*self._points[cluster.members[0]], zoom)
+            if any(self._cell(*self._points[m], zoom) != first for m in cluster.members[1:]):
+                return zoom
+        return self.max_zoom + 1
+
+    def __len__(self) -> int:
+        return len(self.features)
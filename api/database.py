@@ -3,23 +3,37 @@
 Cache bazy danych dla adresów i współrzędnych
 """
 
-import sqlite3
+import time
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import logging
+from logic.sqlite_pool import ConnectionPool
 
 logger = logging.getLogger(__name__)
 
+# Limit parametrów w jednym zapytaniu IN (...) (starsze SQLite: 999)
+MAX_SQL_PARAMS = 500
+
+# Wersja schematu (PRAGMA user_version): 1 = klucze kanoniczne + tabela aliasów
+SCHEMA_VERSION = 1
+
 class LocationCache:
     """Zarządzanie cache'em lokalizacji w SQLite"""
     
-    def __init__(self, db_path: str = "locations_cache.db"):
+    def __init__(self, db_path: str = "locations_cache.db", pool_size: int = 8):
         self.db_path = db_path
+        # Pula długożyjących połączeń - bez otwierania bazy przy każdym odczycie
+        self._pool = ConnectionPool(db_path, pool_size)
+        self._connection = self._pool.connection
         self._init_db()
     
+    def close(self):
+        """Zamknij wszystkie połączenia z puli"""
+        self._pool.close()
+    
     def _init_db(self):
         """Inicjalizacja bazy danych"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS locations (
                     id INTEGER PRIMARY KEY,
@@ -29,7 +43,22 @@ class LocationCache:
                     cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
-            conn.commit()
+            # Nieudane geokodowania (cache negatywny): reason = 'not_found' | 'error'
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS failed_locations (
+                    address TEXT PRIMARY KEY,
+                    reason TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 1,
+                    failed_at REAL NOT NULL
+                )
+            """)
+            # Warianty zapisu adresu -> klucz kanoniczny
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS location_aliases (
+                    alias TEXT PRIMARY KEY,
+                    address TEXT NOT NULL
+                )
+            """)
             logger.info(f"Baza danych zainicjowana: {self.db_path}")
     
     def get(self, address: str) -> Optional[Tuple[float, float]]:
@@ -43,7 +72,7 @@ class LocationCache:
             Tuple (latitude, longitude) lub None
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.execute(
                     "SELECT latitude, longitude FROM locations WHERE address = ?",
                     (address,)
@@ -69,26 +98,231 @@ class LocationCache:
         Returns:
             True jeśli sukces
         """
+        return self.save_many({address: (latitude, longitude)})
+    
+    def get_many(self, addresses: Iterable[str]) -> Dict[str, Tuple[float, float]]:
+        """
+        Pobierz współrzędne wielu adresów jednym zapytaniem
+        
+        Args:
+            addresses: Adresy do wyszukania
+            
+        Returns:
+            Słownik adres -> (latitude, longitude) tylko dla trafień
+        """
+        addresses = list(dict.fromkeys(addresses))
+        found = {}
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute(
-                    "INSERT OR REPLACE INTO locations (address, latitude, longitude) VALUES (?, ?, ?)",
-                    (address, latitude, longitude)
-                )
-                conn.commit()
-                logger.debug(f"Zapisano w cache: {address}")
+            with self._connection() as conn:
+                for i in range(0, len(addresses), MAX_SQL_PARAMS):
+                    chunk = addresses[i:i + MAX_SQL_PARAMS]
+                    cursor = conn.execute(
+                        "SELECT address, latitude, longitude FROM locations "
+                        f"WHERE address IN ({', '.join('?' * len(chunk))})",
+                        chunk
+                    )
+                    for address, lat, lon in cursor:
+                        found[address] = (lat, lon)
+        except Exception as e:
+            logger.error(f"Błąd odczytu cache'u: {e}")
+        
+        return found
+    
+    def save_many(self, locations: Dict[str, Tuple[float, float]]) -> bool:
+        """
+        Zapisz wiele współrzędnych w jednej transakcji
+        
+        Args:
+            locations: Słownik adres -> (latitude, longitude)
+            
+        Returns:
+            True jeśli sukces
+        """
+        if not locations:
+            return True
+        try:
+            with self._connection() as conn:
+                self._write_locations(conn, locations)
+                logger.debug(f"Zapisano w cache: {len(locations)} adresów")
                 return True
         except Exception as e:
             logger.error(f"Błąd zapisu cache'u: {e}")
             return False
     
+    def get_failures(self, addresses: Iterable[str]) -> Dict[str, Tuple[str, int, float]]:
+        """
+        Pobierz zapisane niepowodzenia geokodowania
+        
+        Args:
+            addresses: Adresy do wyszukania
+            
+        Returns:
+            Słownik adres -> (reason, attempts, failed_at)
+        """
+        try:
+            with self._connection() as conn:
+                return self._read_failures(conn, dict.fromkeys(addresses))
+        except Exception as e:
+            logger.error(f"Błąd odczytu cache'u: {e}")
+            return {}
+    
+    def save_results(self, locations: Dict[str, Tuple[float, float]], failures: Dict[str, str],
+                     aliases: Dict[str, str]) -> Dict[str, Tuple[str, int, float]]:
+        """
+        Zapisz wynik geokodowania (współrzędne, niepowodzenia, aliasy) w jednej transakcji
+        (licznik prób niepowodzenia rośnie przy powtórkach)
+
+        Args:
+            locations: Słownik adres -> (latitude, longitude)
+            failures: Słownik adres -> reason
+            aliases: Słownik wariant -> klucz kanoniczny
+
+        Returns:
+            Zapisane niepowodzenia: adres -> (reason, attempts, failed_at)
+        """
+        if not (locations or failures or aliases):
+            return {}
+        try:
+            with self._connection() as conn:
+                self._write_locations(conn, locations)
+                conn.executemany(
+                    "INSERT INTO failed_locations (address, reason, attempts, failed_at) "
+                    "VALUES (?, ?, 1, ?) "
+                    "ON CONFLICT(address) DO UPDATE SET reason = excluded.reason, "
+                    "attempts = failed_locations.attempts + 1, failed_at = excluded.failed_at",
+                    [(address, reason, time.time()) for address, reason in failures.items()]
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO location_aliases (alias, address) VALUES (?, ?)",
+                    list(aliases.items())
+                )
+                return self._read_failures(conn, failures)
+        except Exception as e:
+            logger.error(f"Błąd zapisu cache'u: {e}")
+            return {}
+    
+    @staticmethod
+    def _write_locations(conn, locations: Dict[str, Tuple[float, float]]):
+        """Współrzędne w transakcji conn (znalezione adresy przestają być niepowodzeniami)"""
+        conn.executemany(
+            "INSERT OR REPLACE INTO locations (address, latitude, longitude) VALUES (?, ?, ?)",
+            [(address, lat, lon) for address, (lat, lon) in locations.items()]
+        )
+        conn.executemany(
+            "DELETE FROM failed_locations WHERE address = ?",
+            [(address,) for address in locations]
+        )
+    
+    @staticmethod
+    def _read_failures(conn, addresses: Iterable[str]) -> Dict[str, Tuple[str, int, float]]:
+        """Niepowodzenia adresów w transakcji conn: adres -> (reason, attempts, failed_at)"""
+        addresses = list(addresses)
+        found = {}
+        for i in range(0, len(addresses), MAX_SQL_PARAMS):
+            chunk = addresses[i:i + MAX_SQL_PARAMS]
+            cursor = conn.execute(
+                "SELECT address, reason, attempts, failed_at FROM failed_locations "
+                f"WHERE address IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            for address, reason, attempts, failed_at in cursor:
+                found[address] = (reason, attempts, failed_at)
+        return found
+
+    def migrate_keys(self, key_func: Callable[[str], str]) -> int:
+        """
+        Jednorazowa migracja do kluczy kanonicznych: dotychczasowe adresy trafiają
+        do tabeli aliasów, a wiersze z tym samym kluczem są scalane (zostaje najstarszy)
+        
+        Args:
+            key_func: Funkcja wyznaczająca klucz kanoniczny
+            
+        Returns:
+            Liczba przekluczowanych wierszy
+        """
+        try:
+            with self._connection() as conn:
+                if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                    return 0
+                
+                rekeyed = 0
+                rows = conn.execute("SELECT id, address FROM locations ORDER BY id").fetchall()
+                for row_id, address in rows:
+                    key = key_func(address)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO location_aliases (alias, address) VALUES (?, ?)",
+                        (address, key)
+                    )
+                    if key == address:
+                        continue
+                    exists = conn.execute(
+                        "SELECT 1 FROM locations WHERE address = ?", (key,)
+                    ).fetchone()
+                    if exists:
+                        conn.execute("DELETE FROM locations WHERE id = ?", (row_id,))
+                    else:
+                        conn.execute("UPDATE locations SET address = ? WHERE id = ?", (key, row_id))
+                    rekeyed += 1
+                
+                # Niepowodzenia po prostu przeliczamy na nowe klucze
+                failures = conn.execute("SELECT address FROM failed_locations").fetchall()
+                for (address,) in failures:
+                    key = key_func(address)
+                    if key != address:
+                        conn.execute(
+                            "UPDATE OR REPLACE failed_locations SET address = ? WHERE address = ?",
+                            (key, address)
+                        )
+                
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                logger.info(f"Migracja kluczy cache'u: {rekeyed} z {len(rows)} adresów")
+                return rekeyed
+        except Exception as e:
+            logger.error(f"Błąd migracji cache'u: {e}")
+            return 0
+    
+    def get_recent(self, limit: int) -> List[Tuple[str, float, float]]:
+        """
+        Pobierz ostatnio zapisane lokalizacje (do rozgrzania cache'u w pamięci)
+        
+        Args:
+            limit: Maksymalna liczba wierszy
+            
+        Returns:
+            Lista (address, latitude, longitude) od najnowszych
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.execute(
+                    "SELECT address, latitude, longitude FROM locations "
+                    "ORDER BY cached_at DESC, id DESC LIMIT ?",
+                    (limit,)
+                )
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Błąd odczytu cache'u: {e}")
+            return []
+    
+    def clear(self) -> bool:
+        """Usuń wszystkie wpisy z cache'u"""
+        try:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM locations")
+                conn.execute("DELETE FROM failed_locations")
+                conn.execute("DELETE FROM location_aliases")
+                return True
+        except Exception as e:
+            logger.error(f"Błąd czyszczenia cache'u: {e}")
+            return False
+    
     def get_stats(self) -> dict:
         """Pobierz statystyki cache'u"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.execute("SELECT COUNT(*) FROM locations")
                 count = cursor.fetchone()[0]
-                return {"cached_locations": count}
+                failed = conn.execute("SELECT COUNT(*) FROM failed_locations").fetchone()[0]
+                return {"cached_locations": count, "failed_locations": failed}
         except Exception as e:
             logger.error(f"Błąd statystyk: {e}")
-            return {"cached_locations": 0}
\ No newline at end of file
+            return {"cached_locations": 0, "failed_locations": 0}
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Fasety dzielnic i kategorii jako bitmapy nad listą features GeoJSON
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from logic.address import fold
+
+FIELDS = ("district", "category")
+
+
+class Facets:
+    """
+    Dla każdej wartości dzielnicy i kategorii bitmapa (int) features, które ją
+    mają - filtr to OR wartości w obrębie pola i AND między polami
+    """
+
+    def __init__(self, features: Iterable[dict]):
+        self.features: List[dict] = list(features)
+        self.all = (1 << len(self.features)) - 1
+        self._bitmaps: Dict[str, Dict[str, int]] = {field: {} for field in FIELDS}
+        self._labels: Dict[str, Dict[str, str]] = {field: {} for field in FIELDS}
+        # Pozycja bitu wydarzenia (link)
+        self._positions: Dict[str, int] = {}
+        for i, feature in enumerate(self.features):
+            properties = feature["properties"]
+            self._positions[properties["link"]] = i
+            self._add("district", properties.get("district"), 1 << i)
+            for category in properties.get("category") or []:
+                self._add("category", category, 1 << i)
+
+    def _add(self, field: str, value, bit: int):
+        if not value:
+            return
+        key = fold(value.strip())
+        self._bitmaps[field][key] = self._bitmaps[field].get(key, 0) | bit
+        self._labels[field].setdefault(key, value.strip())
+
+    def mask(self, district: Sequence[str] = (), category: Sequence[str] = ()) -> int:
+        """Bitmapa features pasujących do filtrów (pusty filtr = bez ograniczeń)"""
+        result = self.all
+        for field, values in (("district", district), ("category", category)):
+            if values:
+                bitmaps = self._bitmaps[field]
+                matching = 0
+                for value in values:
+                    matching |= bitmaps.get(fold(value.strip()), 0)
+                result &= matching
+        return result
+
+    def contains(self, mask: int, feature: dict) -> bool:
+        position = self._positions.get(feature["properties"]["link"])
+        return position is not None and bool(mask >> position & 1)
+
+    def select(self, mask: int) -> List[dict]:
+        """Features z bitmapy, w kolejności dodania"""
+        selected = []
+        while mask:
+            lowest = mask & -mask
+            selected.append(self.features[lowest.bit_length() - 1])
+            mask ^= lowest
+        return selected
+
+    def counts(self, mask: Optional[int] = None) -> dict:
+        """Liczby features per dzielnica i kategoria (w obrębie mask), malejąco"""
+        mask = self.all if mask is None else mask
+        result = {"total": mask.bit_count()}
+        for field in FIELDS:
+            labels = self._labels[field]
+            counts = ((labels[key], (bitmap & mask).bit_count()) for key, bitmap in self._bitmaps[field].items())
+            result[field] = dict(sorted(((label, n) for label, n in counts if n),
+                                        key=lambda pair: (-pair[1], pair[0])))
+        return result
+
+    def __len__(self) -> int:
+        return len(self.features)
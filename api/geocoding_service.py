@@ -3,51 +3,334 @@
 Serwis geokodowania z cache'owaniem
 """
 
-from typing import Optional, Tuple
+from typing import Dict, Iterable, Optional, Tuple
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from geopy.exc import GeocoderTimedOut
 from geopy.geocoders import ArcGIS
+from logic.metrics import GEOCODE_CACHE_SECONDS, GEOCODE_UPSTREAM_SECONDS, UPSTREAM_ERRORS
 from api.database import LocationCache
+from logic.memory_cache import MemoryCache
+from logic.singleflight import SingleFlight
+from logic.address import NON_GEOCODABLE, canonical_key
 
 logger = logging.getLogger(__name__)
 
+# Powody niepowodzenia w cache'u negatywnym
+NOT_FOUND = "not_found"
+ERROR = "error"
+
+# Znacznik nieudanego geokodowania w cache'u w pamięci
+NEGATIVE = object()
+
 class GeocodingService:
     """Serwis geokodowania z cache"""
     
-    def __init__(self, cache_db: str = "locations_cache.db", timeout: int = 10):
+    def __init__(self, cache_db: str = "locations_cache.db", timeout: int = 10,
+                 max_workers: int = 4, min_delay_seconds: float = 0.1,
+                 memory_size: int = 4096, memory_ttl: float = 24 * 60 * 60,
+                 not_found_ttl: float = 7 * 24 * 60 * 60,
+                 error_retry_base: float = 60, error_retry_max: float = 60 * 60):
+        """
+        Args:
+            cache_db: ścieżka bazy cache'u lokalizacji
+            timeout: timeout zapytań do ArcGIS (s)
+            max_workers: liczba równoległych zapytań w geocode_many
+            min_delay_seconds: minimalny odstęp między kolejnymi zapytaniami do ArcGIS
+            memory_size: liczba adresów trzymanych w pamięci przed SQLite
+            memory_ttl: czas życia wpisu w pamięci (s)
+            not_found_ttl: jak długo nie ponawiać adresu, którego ArcGIS nie znalazł (s)
+            error_retry_base: pierwsza przerwa po błędzie przejściowym (timeout, błąd usługi);
+                kolejne rosną wykładniczo do error_retry_max (s)
+        """
         self.cache = LocationCache(cache_db)
+        self.cache.migrate_keys(canonical_key)
+        self.memory = MemoryCache(maxsize=memory_size, ttl=memory_ttl)
+        self.not_found_ttl = not_found_ttl
+        self.error_retry_base = error_retry_base
+        self.error_retry_max = error_retry_max
+        self.sqlite_hits = 0
+        self.sqlite_misses = 0
+        self.negative_hits = 0
         self.timeout = timeout
+        self.max_workers = max(1, max_workers)
+        self.min_delay_seconds = min_delay_seconds
         self.geocoder = ArcGIS(timeout=timeout)
+        # Równoległe wątki (geocode i geocode_many, także z różnych dni) nie geokodują
+        # tego samego klucza dwa razy - czekają na wynik pierwszego
+        self._flight = SingleFlight()
+        # Wyniki z ArcGIS jeszcze niezapisane w SQLite: klucz -> (współrzędne, powód niepowodzenia);
+        # zapisuje je pierwsze wywołanie, które je odbierze (_claim)
+        self._unsaved: Dict[str, Tuple[Optional[Tuple[float, float]], Optional[str]]] = {}
+        self._unsaved_lock = threading.Lock()
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
+        self._stats_lock = threading.Lock()
     
-    def geocode(self, address: str) -> Optional[Tuple[float, float]]:
+    def warm_memory(self, limit: Optional[int] = None) -> int:
         """
-        Geokoduj adres (z cache)
+        Wczytaj ostatnio zapisane lokalizacje z SQLite do pamięci
         
         Args:
-            address: Adres do geokodowania
+            limit: liczba wierszy (domyślnie pojemność cache'u w pamięci)
             
         Returns:
-            Tuple (latitude, longitude) lub None
+            Liczba wczytanych adresów
         """
-        if not address or address == "Brak adresu":
-            return None
+        limit = min(limit or self.memory.maxsize, self.memory.maxsize)
+        rows = self.cache.get_recent(limit)
+        # Od najstarszych, żeby najnowsze były najświeższe w LRU
+        for address, lat, lon in reversed(rows):
+            self.memory.set(address, (lat, lon))
+        logger.info(f"Rozgrzano cache w pamięci: {len(rows)} adresów")
+        return len(rows)
+    
+    def _count_sqlite(self, hits: int, misses: int, negative: int = 0):
+        with self._stats_lock:
+            self.sqlite_hits += hits
+            self.sqlite_misses += misses
+            self.negative_hits += negative
+    
+    def _retry_after(self, reason: str, attempts: int) -> float:
+        """Czas (s), przez który niepowodzenie jest ważne"""
+        if reason == NOT_FOUND:
+            return self.not_found_ttl
+        return min(self.error_retry_base * 2 ** (attempts - 1), self.error_retry_max)
+    
+    def _active_failures(self, addresses) -> Dict[str, float]:
+        """Adresy z aktualnym wpisem negatywnym -> pozostały czas ważności (s)"""
+        active = {}
+        now = time.time()
+        for address, (reason, attempts, failed_at) in self.cache.get_failures(addresses).items():
+            remaining = failed_at + self._retry_after(reason, attempts) - now
+            if remaining > 0:
+                active[address] = remaining
+        return active
+    
+    def _resolve_miss(self, key: str, query: str) -> Optional[Tuple[float, float]]:
+        """
+        Klucz spoza cache'u: ponowne sprawdzenie pamięci i SQLite (inny wątek mógł
+        go właśnie rozwiązać), cache negatywny, a na końcu ArcGIS
         
+        Wywoływane przez self._flight - dla danego klucza najwyżej jedno naraz.
+        Chybienie w pamięci policzyło już wywołanie geocode / geocode_many.
+        """
+        cached = self.memory.peek(key)
+        if cached is NEGATIVE:
+            return None
+        if cached:
+            return cached
+        with self._unsaved_lock:
+            if key in self._unsaved:
+                return self._unsaved[key][0]
         
-        cached = self.cache.get(address)
+        with GEOCODE_CACHE_SECONDS.time(tier="sqlite"):
+            cached = self.cache.get(key)
         if cached:
-            logger.info(f"Cache hit: {address}")
+            self._count_sqlite(1, 0)
+            self.memory.set(key, cached)
             return cached
         
+        failure = self._active_failures([key]).get(key)
+        self._count_sqlite(0, 1, negative=1 if failure else 0)
+        if failure:
+            self.memory.set(key, NEGATIVE, ttl=failure)
+            return None
+        
+        coords, reason = self._geocode_upstream(query)
+        # Pamięć od razu (kolejne wywołania nie pytają ArcGIS), SQLite zbiorczo w _save_claimed
+        if coords:
+            self.memory.set(key, coords)
+        else:
+            self.memory.set(key, NEGATIVE, ttl=self._retry_after(reason, 1))
+        with self._unsaved_lock:
+            self._unsaved[key] = (coords, reason)
+        return coords
+    
+    def _resolve_misses(self, queries: Dict[str, str]) -> Dict[str, Optional[Tuple[float, float]]]:
+        """Klucz -> wynik _resolve_miss; ArcGIS równolegle, najwyżej max_workers naraz"""
+        keys = list(queries)
+        
+        def resolve(key: str):
+            return self._flight.do(key, lambda: self._resolve_miss(key, queries[key]))
+        
+        if len(keys) == 1:
+            return {keys[0]: resolve(keys[0])}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(keys))) as executor:
+            return dict(zip(keys, executor.map(resolve, keys)))
+    
+    def _save_claimed(self, keys: Iterable[str], aliases: Dict[str, str]) -> None:
+        """Zapisz w SQLite (jedna transakcja) niezapisane wyniki ArcGIS dla kluczy i aliasy"""
+        with self._unsaved_lock:
+            claimed = {key: self._unsaved.pop(key) for key in keys if key in self._unsaved}
+        locations = {key: coords for key, (coords, _) in claimed.items() if coords}
+        failures = {key: reason for key, (coords, reason) in claimed.items() if not coords}
+        stored = self.cache.save_results(locations, failures, aliases)
+        for key, (reason, attempts, _) in stored.items():
+            self.memory.set(key, NEGATIVE, ttl=self._retry_after(reason, attempts))
+    
+    def retryable(self, addresses: Iterable[str]) -> set:
+        """
+        Adresy (spośród geokodowalnych), dla których nie ma aktualnego wpisu
+        "nie znaleziono" - np. po błędzie przejściowym ponowna próba ma sens
+        """
+        keys = {}
+        for address in addresses:
+            if address and address not in NON_GEOCODABLE:
+                key = canonical_key(address)
+                if key:
+                    keys[address] = key
+        if not keys:
+            return set()
+        now = time.time()
+        not_found = {key for key, (reason, attempts, failed_at) in self.cache.get_failures(keys.values()).items()
+                     if reason == NOT_FOUND and failed_at + self._retry_after(reason, attempts) > now}
+        return {address for address, key in keys.items() if key not in not_found}
+    
+    def get_stats(self) -> dict:
+        """Statystyki cache'u z podziałem na warstwy"""
+        with self._stats_lock:
+            sqlite_tier = {"hits": self.sqlite_hits, "misses": self.sqlite_misses}
+            negative_tier = {"hits": self.negative_hits}
+        stats = self.cache.get_stats()
+        negative_tier["stored"] = stats["failed_locations"]
+        return {
+            **stats,
+            "tiers": {"memory": self.memory.get_stats(), "sqlite": sqlite_tier,
+                      "negative": negative_tier},
+        }
+    
+    def clear(self) -> bool:
+        """Wyczyść obie warstwy cache'u"""
+        self.memory.clear()
+        return self.cache.clear()
+    
+    def _wait_for_rate_limit(self):
+        """Rezerwuje slot czasowy na zapytanie do ArcGIS i czeka na niego"""
+        with self._rate_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_request_at)
+            self._next_request_at = slot + self.min_delay_seconds
+        if slot > now:
+            time.sleep(slot - now)
+    
+    def _geocode_upstream(self, address: str) -> Tuple[Optional[Tuple[float, float]], Optional[str]]:
+        """
+        Zapytanie do ArcGIS (bez cache'u)
         
+        Returns:
+            Tuple (współrzędne lub None, powód niepowodzenia lub None)
+        """
+        self._wait_for_rate_limit()
+        started = time.perf_counter()
         try:
             full_address = f"{address}, Warszawa, Polska"
             location = self.geocoder.geocode(full_address)
             
             if location:
                 coords = (location.latitude, location.longitude)
-                self.cache.save(address, location.latitude, location.longitude)
+                GEOCODE_UPSTREAM_SECONDS.observe(time.perf_counter() - started, result="found")
                 logger.info(f"Geokodowano: {address} -> {coords}")
-                return coords
+                return coords, None
+            GEOCODE_UPSTREAM_SECONDS.observe(time.perf_counter() - started, result="not_found")
+            logger.info(f"Nie znaleziono adresu: {address}")
+            return None, NOT_FOUND
         except Exception as e:
+            kind = "timeout" if isinstance(e, GeocoderTimedOut) else "error"
+            GEOCODE_UPSTREAM_SECONDS.observe(time.perf_counter() - started, result=kind)
+            UPSTREAM_ERRORS.inc(service="arcgis", kind=kind)
             logger.error(f"Błąd geokodowania '{address}': {e}")
+            return None, ERROR
+    
+    def geocode(self, address: str) -> Optional[Tuple[float, float]]:
+        """
+        Geokoduj adres (z cache)
+        
+        Args:
+            address: Adres do geokodowania
+        
+        Returns:
+            Tuple (latitude, longitude) lub None
+        """
+        if not address or address in NON_GEOCODABLE:
+            return None
+        key = canonical_key(address)
+        if not key:
+            return None
+        
+        with GEOCODE_CACHE_SECONDS.time(tier="memory"):
+            cached = self.memory.get(key)
+        if cached is NEGATIVE:
+            self._count_sqlite(0, 0, negative=1)
+            return None
+        if cached:
+            return cached
+        
+        coords = self._resolve_misses({key: address})[key]
+        self._save_claimed([key], {address: key})
+        return coords
+    
+    def geocode_many(self, addresses: Iterable[str]) -> Dict[str, Optional[Tuple[float, float]]]:
+        """
+        Geokoduj wiele adresów naraz: jedno zapytanie do cache'u, równoległe
+        zapytania do ArcGIS dla brakujących i zapis w jednej transakcji
+        
+        Args:
+            addresses: Adresy do geokodowania (mogą się powtarzać)
+        
+        Returns:
+            Słownik adres -> (latitude, longitude) lub None
+        """
+        keys = {}
+        for address in dict.fromkeys(addresses):
+            if address and address not in NON_GEOCODABLE:
+                key = canonical_key(address)
+                if key:
+                    keys[address] = key
+        if not keys:
+            return {}
+        
+        # Pierwszy wariant zapisu klucza posłuży jako zapytanie do ArcGIS
+        queries = {}
+        for address, key in keys.items():
+            queries.setdefault(key, address)
+        unique = list(queries)
+        
+        results = dict.fromkeys(unique)
+        in_memory = {}
+        negative = 0
+        for key in unique:
+            coords = self.memory.get(key)
+            if coords is NEGATIVE:
+                negative += 1
+                in_memory[key] = None
+            elif coords:
+                in_memory[key] = coords
+        results.update(in_memory)
+        
+        remaining = [k for k in unique if k not in in_memory]
+        cached = {}
+        if remaining:
+            with GEOCODE_CACHE_SECONDS.time(tier="sqlite_batch"):
+                cached = self.cache.get_many(remaining)
+        for key, coords in cached.items():
+            self.memory.set(key, coords)
+        results.update(cached)
+        
+        misses = [k for k in remaining if k not in cached]
+        failed = self._active_failures(misses) if misses else {}
+        for key, ttl in failed.items():
+            self.memory.set(key, NEGATIVE, ttl=ttl)
+        # Pozostałe chybienia liczy _resolve_miss
+        self._count_sqlite(len(cached), len(failed), negative=negative + len(failed))
+        
+        misses = {k: queries[k] for k in misses if k not in failed}
+        if misses:
+            results.update(self._resolve_misses(misses))
+            self._save_claimed(misses, {a: k for a, k in keys.items() if k in misses})
         
-        return None
\ No newline at end of file
+        logger.info(f"Geokodowanie zbiorcze: {len(unique)} adresów, "
+                    f"{len(in_memory)} z pamięci, {len(cached)} z SQLite")
+        return {address: results[key] for address, key in keys.items()}
@@ -3,21 +3,123 @@
 FastAPI server dla geoportalu wydarzeń Warszawy
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import date, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional
+import asyncio
+import json
 import logging
+import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from contextlib import asynccontextmanager
-from logic.parser_update import Waw4FreeParser, EventBox
+from logic.parser_update import Waw4FreeParser, EventBox, PageFetchError
+from logic.page_cache import PageCache
+from logic.event_store import EventStore
 from api.geocoding_service import GeocodingService
+from api.response_cache import CachedResponse, ResponseCache
+from logic.memory_cache import MemoryCache
+from api.prefetch import PrefetchScheduler
+from logic.singleflight import AsyncSingleFlight, SingleFlight
+from logic.metrics import REGISTRY, REQUEST_SECONDS, RESPONSE_BYTES
+from api.spatial import GridIndex
+from api.clustering import ZoomClusters, in_tile, tile_bounds
+from api.search_index import SearchIndex
+from api.facets import Facets
+
+# Rozgrzewanie nadchodzących dni w tle (konfiguracja przez zmienne środowiskowe)
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+PREFETCH_DAYS = int(os.getenv("PREFETCH_DAYS", "3"))
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", str(30 * 60)))
+PREFETCH_JITTER = float(os.getenv("PREFETCH_JITTER", "60"))
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "2"))
+# Dane dnia muszą przeżyć do kolejnego odświeżenia
+DAY_CACHE_TTL = 2 * PREFETCH_INTERVAL
+# Wątki dla blokującego scrapingu / geokodowania / SQLite (poza pętlą zdarzeń)
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "4"))
+# Ile dni zakresu pobierać równocześnie
+RANGE_CONCURRENCY = int(os.getenv("RANGE_CONCURRENCY", str(SCRAPE_WORKERS)))
+# Zapytania przestrzenne: najdłuższy zakres dat i największy promień
+MAX_QUERY_DAYS = int(os.getenv("MAX_QUERY_DAYS", "366"))
+MAX_RADIUS_M = 50_000
+MAX_TILE_ZOOM = 22
+TILES_PER_DATE = 4096
+# Znacznik niedostępnego dnia (strona waw4free nie odpowiada) w odpowiedziach zakresów
+DAY_UNAVAILABLE = "Nie udało się pobrać strony dnia z waw4free"
+
+blocking_executor = ThreadPoolExecutor(max_workers=SCRAPE_WORKERS, thread_name_prefix="scrape")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Wykonuje blokującą funkcję w puli wątków, nie blokując pętli zdarzeń"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor, partial(func, *args, **kwargs))
 
-parser = Waw4FreeParser()
 geocoding_service = GeocodingService()
+parser = Waw4FreeParser(page_cache=PageCache(), event_store=EventStore(), geocoder=geocoding_service,
+                        pool_size=8 * SCRAPE_WORKERS)
+# Sparsowane wydarzenia per data
+day_events_cache = MemoryCache(maxsize=120, ttl=DAY_CACHE_TTL)
+# Gotowe odpowiedzi GeoJSON per data (JSON + gzip + ETag)
+geojson_cache = ResponseCache(ttl=DAY_CACHE_TTL)
+# Indeks przestrzenny features GeoJSON per data (zapytania o promień / prostokąt)
+spatial_index_cache = MemoryCache(maxsize=400, ttl=DAY_CACHE_TTL)
+# Klastry wszystkich poziomów powiększenia per data
+cluster_cache = MemoryCache(maxsize=120, ttl=DAY_CACHE_TTL)
+# Gotowe kafelki GeoJSON: data -> ResponseCache (z/x/y, klastry) -> odpowiedź
+tile_cache = MemoryCache(maxsize=120, ttl=DAY_CACHE_TTL)
+# Bitmapy dzielnic i kategorii per data (filtry i fasety)
+facet_cache = MemoryCache(maxsize=120, ttl=DAY_CACHE_TTL)
+# Wyszukiwanie pełnotekstowe po zapisanych i nowo pobranych wydarzeniach
+search_index = SearchIndex()
+# Wersja wydarzeń dnia, zwiększana przy unieważnieniu: wynik policzony ze starszych
+# wydarzeń (budowa w trakcie unieważnienia) nie trafia już do cache'u
+view_versions: Dict[date, int] = {}
+views_lock = threading.Lock()
+# Równoległe zapytania o tę samą datę czekają na jedno obliczenie:
+# request_flight w pętli zdarzeń (nie zajmuje wątków), day_flight w wątkach (prefetch i endpointy)
+request_flight = AsyncSingleFlight()
+day_flight = SingleFlight()
+
+
+def collect_cache_metrics():
+    """Liczniki cache'y i łączenia zapytań (prowadzone przez same komponenty)"""
+    memory = geocoding_service.memory.get_stats()
+    pages = parser.page_cache.get_stats()
+    flights = {"requests": request_flight, "days": day_flight, "detail_pages": parser.address_flight}
+    return [
+        ("location_cache_requests_total", "counter", "Odczyty cache'u geokodowania (LocationCache)", [
+            ("", {"tier": "memory", "result": "hit"}, memory["hits"]),
+            ("", {"tier": "memory", "result": "miss"}, memory["misses"]),
+            ("", {"tier": "sqlite", "result": "hit"}, geocoding_service.sqlite_hits),
+            ("", {"tier": "sqlite", "result": "miss"}, geocoding_service.sqlite_misses),
+            ("", {"tier": "negative", "result": "hit"}, geocoding_service.negative_hits),
+        ]),
+        ("page_cache_requests_total", "counter", "Odczyty cache'u stron waw4free", [
+            ("", {"result": "hit"}, pages["hits"]),
+            ("", {"result": "revalidated"}, pages["revalidated"]),
+            ("", {"result": "miss"}, pages["misses"]),
+        ]),
+        ("response_cache_requests_total", "counter", "Odczyty cache'y odpowiedzi", [
+            ("", {"cache": name, "result": result}, stats[key])
+            for name, stats in (("day_events", day_events_cache.get_stats()),
+                                ("geojson", geojson_cache.get_stats()))
+            for result, key in (("hit", "hits"), ("miss", "misses"))
+        ]),
+        ("coalesced_requests_total", "counter", "Wywołania dołączone do trwającego obliczenia", [
+            ("", {"flight": name}, flight.get_stats()["coalesced"]) for name, flight in flights.items()
+        ]),
+    ]
+
+
+REGISTRY.register(collect_cache_metrics)
 
 
 @asynccontextmanager
@@ -26,8 +128,17 @@ async def lifespan(app: FastAPI):
     
     logger.info("Inicjalizacja cache'u...")
     geocoding_service.cache._init_db()
+    geocoding_service.warm_memory()
+    load_search_index()
+    if PREFETCH_ENABLED:
+        prefetch_scheduler.start()
     yield
     logger.info("Zamykanie aplikacji...")
+    await prefetch_scheduler.stop()
+    blocking_executor.shutdown(wait=False, cancel_futures=True)
+    geocoding_service.cache.close()
+    parser.page_cache.close()
+    parser.event_store.close()
 
 
 
@@ -74,6 +185,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Czas obsługi i rozmiar odpowiedzi per endpoint (także strumieniowanych)"""
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    endpoint = getattr(route, "path", "other")
+    labels = {"endpoint": endpoint, "method": request.method, "status": response.status_code}
+    body = response.body_iterator
+    
+    async def counted_body():
+        size = 0
+        try:
+            async for chunk in body:
+                size += len(chunk)
+                yield chunk
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, **labels)
+            RESPONSE_BYTES.observe(size, endpoint=endpoint)
+    
+    response.body_iterator = counted_body()
+    return response
+
+
 from pydantic import BaseModel
 
 class EventResponse(BaseModel):
@@ -100,11 +236,235 @@ class EventsResponse(BaseModel):
 class StatsResponse(BaseModel):
     """Model statystyk"""
     cached_locations: int
+    failed_locations: int = 0
+    stored_events: int = 0
+    tiers: Dict[str, Dict[str, int]] = {}
+    page_cache: Dict[str, int] = {}
+    geojson_cache: Dict[str, int] = {}
+    coalescing: Dict[str, Dict[str, int]] = {}
+
+
+def build_geojson(raw_events) -> dict:
+    """Buduje FeatureCollection z geokodowanych wydarzeń w granicach Warszawy"""
+    features = []
+    for event in raw_events:
+        if isinstance(event, EventBox):
+            # Współrzędne ustala parser (przez geocoding_service z cache'em)
+            coords = event.position
+            
+            if coords and is_within_warsaw(coords[0], coords[1]):
+                feature = {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Point",
+                        "coordinates": [coords[1], coords[0]]  # GeoJSON: [lon, lat]
+                    },
+                    "properties": {
+                        "title": event.title,
+                        "address": event.address,
+                        "district": event.district,
+                        "date": event.date,
+                        "start_date": event.start_date,
+                        "end_date": event.end_date,
+                        "time": event.time,
+                        "image": event.image,
+                        "link": event.plink,
+                        "category": event.box_category or []
+                    }
+                }
+                features.append(feature)
+    
+    return {
+        "type": "FeatureCollection",
+        "features": features
+    }
+
+
+def load_day_events(event_date: date, refresh: bool = False) -> list:
+    """
+    Wydarzenia dnia z cache'u lub z parsera (blokujące)
+    
+    Args:
+        event_date: data
+        refresh: pomiń cache i pobierz ponownie
+    """
+    events = None if refresh else day_events_cache.get(event_date)
+    if events is None:
+        events, _ = day_flight.do(event_date, partial(_scrape_day, event_date))
+    return events
+
+
+def _scrape_day(event_date: date) -> tuple:
+    """Pobiera dzień; odpowiedzi pochodne usuwane tylko, gdy wydarzenia się zmieniły"""
+    events, diff = parser.get_events_and_diff(event_date.day, event_date.month, event_date.year)
+    # Najpierw nowe wydarzenia, potem unieważnienie - budowa rozpoczęta później widzi nowe
+    day_events_cache.set(event_date, events)
+    if diff:
+        invalidate_views(event_date)
+    # Usuniętych z tego dnia nie wyrzucamy z indeksu - wydarzenie wielodniowe może być na innych stronach
+    updated = set(diff.added) | set(diff.changed)
+    search_index.add_many(e for e in events if isinstance(e, EventBox) and e.plink in updated)
+    return events, diff
+
+
+def load_search_index() -> int:
+    """Indeks wyszukiwania z magazynu wydarzeń (przy starcie)"""
+    stored = (EventBox(**{k: v for k, v in row.items() if k != "last_seen"})
+              for row in parser.event_store.iter_events())
+    count = search_index.add_many(stored)
+    logger.info(f"Indeks wyszukiwania: {count} wydarzeń")
+    return count
+
+
+def store_view(cache, event_date: date, version: int, value) -> None:
+    """Zapisz wynik liczony z wydarzeń dnia, o ile od początku budowy nie było unieważnienia"""
+    with views_lock:
+        if view_versions.get(event_date, 0) == version:
+            cache.set(event_date, value)
+
+
+def build_day_geojson(event_date: date):
+    """Wydarzenia dnia jako gotowa (zserializowana) odpowiedź GeoJSON (blokujące)"""
+    cached = geojson_cache.get(event_date)
+    if cached is None:
+        version = view_versions.get(event_date, 0)
+        cached = CachedResponse.from_payload(build_geojson(load_day_events(event_date)))
+        store_view(geojson_cache, event_date, version, cached)
+    return cached
+
+
+def load_day_index(event_date: date) -> GridIndex:
+    """Indeks przestrzenny wydarzeń dnia (blokujące)"""
+    index = spatial_index_cache.get(event_date)
+    if index is None:
+        version = view_versions.get(event_date, 0)
+        index = GridIndex.from_features(build_geojson(load_day_events(event_date))["features"])
+        store_view(spatial_index_cache, event_date, version, index)
+    return index
+
+
+def load_day_clusters(event_date: date) -> ZoomClusters:
+    """Klastry wydarzeń dnia dla wszystkich poziomów powiększenia (blokujące)"""
+    clusters = cluster_cache.get(event_date)
+    if clusters is None:
+        version = view_versions.get(event_date, 0)
+        clusters = ZoomClusters(list(load_day_index(event_date)))
+        store_view(cluster_cache, event_date, version, clusters)
+    return clusters
+
+
+def load_day_facets(event_date: date) -> Facets:
+    """Fasety dzielnic i kategorii wydarzeń dnia (blokujące)"""
+    facets = facet_cache.get(event_date)
+    if facets is None:
+        version = view_versions.get(event_date, 0)
+        # Z listy features (nie z indeksu) - select zwraca je w kolejności ze strony
+        facets = Facets(build_geojson(load_day_events(event_date))["features"])
+        store_view(facet_cache, event_date, version, facets)
+    return facets
+
+
+def refresh_day(event_date: date) -> int:
+    """
+    Pobiera dzień od nowa i przygotowuje gotową odpowiedź GeoJSON oraz indeks
+    (bez zmian w wydarzeniach dotychczasowe zostają w cache'u)
+    
+    PageFetchError (strona niedostępna) przechodzi dalej - scheduler zapisuje błąd,
+    a w cache'u zostają poprzednie dane
+    """
+    events = load_day_events(event_date, refresh=True)
+    build_day_geojson(event_date)
+    load_day_index(event_date)
+    return len(events)
+
+
+prefetch_scheduler = PrefetchScheduler(
+    refresh_day,
+    horizon_days=PREFETCH_DAYS,
+    interval=PREFETCH_INTERVAL,
+    jitter=PREFETCH_JITTER,
+    max_concurrency=PREFETCH_CONCURRENCY,
+    executor=blocking_executor,
+)
+
+
+def invalidate_views(event_date: date) -> None:
+    """Usuwa z cache'u wszystko, co liczone jest z wydarzeń dnia (bez samych wydarzeń)"""
+    with views_lock:
+        view_versions[event_date] = view_versions.get(event_date, 0) + 1
+        geojson_cache.invalidate(event_date)
+        spatial_index_cache.delete(event_date)
+        cluster_cache.delete(event_date)
+        facet_cache.delete(event_date)
+        tile_cache.delete(event_date)
+
+
+def event_to_response(event: EventBox) -> EventResponse:
+    """EventBox -> model odpowiedzi API"""
+    coords = event.position
+    return EventResponse(
+        title=event.title,
+        address=event.address,
+        district=event.district,
+        date=event.date,
+        start_date=event.start_date,
+        end_date=event.end_date,
+        time=event.time,
+        image=event.image,
+        link=event.plink,
+        category=event.box_category,
+        latitude=coords[0] if coords else None,
+        longitude=coords[1] if coords else None,
+    )
+
+
+async def fetch_day_events(event_date: date) -> list:
+    """Wydarzenia dnia poza pętlą zdarzeń, z łączeniem równoległych zapytań"""
+    return await request_flight.do(
+        ("events", event_date), lambda: run_blocking(load_day_events, event_date)
+    )
+
+
+async def fetch_day_index(event_date: date) -> GridIndex:
+    """Indeks przestrzenny dnia poza pętlą zdarzeń, z łączeniem równoległych zapytań"""
+    index = spatial_index_cache.get(event_date)
+    if index is not None:
+        return index
+    return await request_flight.do(
+        ("index", event_date), lambda: run_blocking(load_day_index, event_date)
+    )
+
+
+async def iter_days(dates: List[date], limit: int = RANGE_CONCURRENCY, fetch_day=fetch_day_events):
+    """
+    Pobiera dni równolegle (najwyżej limit naraz) i zwraca (data, wynik fetch_day)
+    w kolejności ukończenia; dla dnia, którego strony nie udało się pobrać
+    (PageFetchError), wynik to None - jeden niedostępny dzień nie przerywa zakresu
+    """
+    semaphore = asyncio.Semaphore(limit)
+    
+    async def fetch(event_date: date):
+        async with semaphore:
+            try:
+                return event_date, await fetch_day(event_date)
+            except PageFetchError as e:
+                logger.error(str(e))
+                return event_date, None
+    
+    tasks = [asyncio.create_task(fetch(d)) for d in dates]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Klient się rozłączył - nie pobieraj reszty
+        for task in tasks:
+            task.cancel()
 
 # Endpointy
 
 @app.get("/api/events/geojson")
-async def get_events_geojson(day: int, month: int, year: int):
+async def get_events_geojson(day: int, month: int, year: int, request: Request,
+                             district: List[str] = Query([]), category: List[str] = Query([])):
     """
     Pobierz wydarzenia jako GeoJSON
     
@@ -112,9 +472,10 @@ async def get_events_geojson(day: int, month: int, year: int):
     - day: dzień (1-31)
     - month: miesiąc (1-12)
     - year: rok
+    - district, category: filtry (można powtarzać; w obrębie pola dowolna z wartości)
     
     Returns:
-        GeoJSON FeatureCollection
+        GeoJSON FeatureCollection (z ETagiem; 304 przy zgodnym If-None-Match)
     """
     try:
         # Walidacja daty
@@ -123,47 +484,25 @@ async def get_events_geojson(day: int, month: int, year: int):
         except ValueError as e:
             raise HTTPException(status_code=400, detail=f"Nieprawidłowa data: {e}")
         
-        # Pobierz eventy
-        raw_events = parser.get_events_from_date(day, month, year)
+        if district or category:
+            facets = await fetch_facets([event_date])
+            features = facets.select(facets.mask(district, category))
+            payload = {"type": "FeatureCollection", "features": features}
+            return CachedResponse.from_payload(payload).to_response(request)
         
-        # Stwórz GeoJSON features
-        features = []
-        for event in raw_events:
-            if isinstance(event, EventBox):
-                # Geokoduj adres
-                coords = geocoding_service.geocode(event.address) if event.address else None
-                
-                if coords and is_within_warsaw(coords[0], coords[1]):
-                    feature = {
-                        "type": "Feature",
-                        "geometry": {
-                            "type": "Point",
-                            "coordinates": [coords[1], coords[0]]  # GeoJSON: [lon, lat]
-                        },
-                        "properties": {
-                            "title": event.title,
-                            "address": event.address,
-                            "district": event.district,
-                            "date": event.date,
-                            "start_date": event.start_date,
-                            "end_date": event.end_date,
-                            "time": event.time,
-                            "image": event.image,
-                            "link": event.plink,
-                            "category": event.box_category or []
-                        }
-                    }
-                    features.append(feature)
-        
-        geojson = {
-            "type": "FeatureCollection",
-            "features": features
-        }
+        cached = geojson_cache.get(event_date)
+        if cached is None:
+            cached = await request_flight.do(
+                ("geojson", event_date), lambda: run_blocking(build_day_geojson, event_date)
+            )
         
-        return geojson
+        return cached.to_response(request)
     
     except HTTPException:
         raise
+    except PageFetchError as e:
+        # Strona waw4free niedostępna - błąd bramy, nie serwera
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         logger.error(f"Błąd: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -188,31 +527,11 @@ async def get_events(day: int, month: int, year: int) -> EventsResponse:
         except ValueError as e:
             raise HTTPException(status_code=400, detail=f"Nieprawidłowa data: {e}")
         
-        # Pobierz eventy
-        raw_events = parser.get_events_from_date(day, month, year)
+        # Pobierz eventy (scraping i geokodowanie poza pętlą zdarzeń)
+        raw_events = await fetch_day_events(event_date)
         
-        # Geokoduj i sformatuj
-        events_response = []
-        for event in raw_events:
-            if isinstance(event, EventBox):
-                # Geokoduj adres
-                coords = geocoding_service.geocode(event.address) if event.address else None
-                
-                event_data = EventResponse(
-                    title=event.title,
-                    address=event.address,
-                    district=event.district,
-                    date=event.date,
-                    start_date=event.start_date,
-                    end_date=event.end_date,
-                    time=event.time,
-                    image=event.image,
-                    link=event.plink,
-                    category=event.box_category,
-                    latitude=coords[0] if coords else None,
-                    longitude=coords[1] if coords else None,
-                )
-                events_response.append(event_data)
+        # Sformatuj
+        events_response = [event_to_response(e) for e in raw_events if isinstance(e, EventBox)]
         
         return EventsResponse(
             date=f"{day:02d}.{month:02d}.{year}",
@@ -222,56 +541,443 @@ async def get_events(day: int, month: int, year: int) -> EventsResponse:
     
     except HTTPException:
         raise
+    except PageFetchError as e:
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         logger.error(f"Błąd: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/events/search")
+async def search_events(q: str, start: Optional[date] = Query(None, alias="from"),
+                        end: Optional[date] = Query(None, alias="to"), limit: int = 100):
+    """
+    Wyszukiwanie w tytułach, kategoriach, dzielnicach i adresach
+    (bez wielkości liter i polskich znaków; każde słowo może być początkiem słowa)
+    
+    Query params:
+    - q: zapytanie, np. "koncert" albo "dla dzieci"
+    - from, to: zakres dat RRRR-MM-DD (opcjonalnie) - wydarzenia trwające choć dzień w zakresie
+    - limit: najwyżej tyle wydarzeń (domyślnie 100)
+    
+    Returns:
+        Wydarzenia znane z magazynu i pobranych dni, po dacie rozpoczęcia
+    """
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail="Data końcowa przed początkową")
+    if not 0 < limit <= 1000:
+        raise HTTPException(status_code=400, detail="limit musi być w zakresie 1-1000")
+    
+    events = search_index.search(q, start, end, limit)
+    return {
+        "query": q,
+        "total": len(events),
+        "events": [event_to_response(e) for e in events],
+    }
+
 @app.get("/api/events-range")
 async def get_events_range(start_day: int, start_month: int, start_year: int,
-                          end_day: int, end_month: int, end_year: int):
+                          end_day: int, end_month: int, end_year: int,
+                          format: str = "json"):
     """
-    Pobierz eventy z zakresu dat
+    Pobierz eventy z zakresu dat (dni pobierane równolegle, najwyżej MAX_QUERY_DAYS dni)
+    
+    Query params:
+    - format: "json" - jeden obiekt z listą eventów (kolejność dat),
+      "ndjson" - strumień, jeden event na linię, dni w kolejności pobrania,
+      "geojson" - strumień FeatureCollection, dni w kolejności pobrania
+    
+    Dni, których strony nie udało się pobrać, są pomijane: unavailable_dates
+    (json, geojson) lub linia {"error": ..., "date": ...} (ndjson)
     """
     try:
-        start = date(start_year, start_month, start_day)
-        end = date(end_year, end_month, end_day)
+        # Każdy dzień to osobne pobranie z waw4free - zakres ograniczony jak w zapytaniach przestrzennych
+        dates = parse_query_dates(start_day, start_month, start_year, end_day, end_month, end_year)
+        start, end = dates[0], dates[-1]
+        if format not in ("json", "ndjson", "geojson"):
+            raise HTTPException(status_code=400, detail=f"Nieznany format: {format}")
         
-        all_events = []
-        current = start
+        if format == "ndjson":
+            return StreamingResponse(_stream_ndjson(dates), media_type="application/x-ndjson")
+        if format == "geojson":
+            return StreamingResponse(_stream_geojson(dates), media_type="application/geo+json")
         
-        while current <= end:
-            events = await get_events(current.day, current.month, current.year)
-            all_events.extend(events.events)
-            current += timedelta(days=1)
+        by_date = {d: events async for d, events in iter_days(dates)}
+        all_events = [event_to_response(e) for d in dates for e in by_date[d] or [] if isinstance(e, EventBox)]
         
         return {
             "start_date": start.isoformat(),
             "end_date": end.isoformat(),
             "total": len(all_events),
-            "events": all_events
+            "events": all_events,
+            "unavailable_dates": [d.isoformat() for d in dates if by_date[d] is None]
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Błąd: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _stream_ndjson(dates: List[date]):
+    """
+    Eventy jako NDJSON, dzień po dniu w miarę pobierania; niedostępny dzień
+    to linia {"error": ..., "date": ...}
+    """
+    async for event_date, events in iter_days(dates):
+        if events is None:
+            marker = {"error": DAY_UNAVAILABLE, "date": event_date.isoformat()}
+            yield (json.dumps(marker, ensure_ascii=False) + "\n").encode("utf-8")
+            continue
+        lines = [event_to_response(e).model_dump_json() for e in events if isinstance(e, EventBox)]
+        if lines:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+async def _stream_geojson(dates: List[date]):
+    """
+    FeatureCollection wysyłana fragmentami, dzień po dniu w miarę pobierania;
+    niedostępne dni na końcu, w polu unavailable_dates
+    """
+    yield b'{"type":"FeatureCollection","features":['
+    first = True
+    unavailable = []
+    async for event_date, events in iter_days(dates):
+        if events is None:
+            unavailable.append(event_date.isoformat())
+            continue
+        for feature in build_geojson(events)["features"]:
+            chunk = json.dumps(feature, ensure_ascii=False, separators=(",", ":"))
+            yield (chunk if first else "," + chunk).encode("utf-8")
+            first = False
+    yield f'],"unavailable_dates":{json.dumps(sorted(unavailable))}}}'.encode("utf-8")
+
+def parse_query_dates(day: int, month: int, year: int, end_day: Optional[int],
+                      end_month: Optional[int], end_year: Optional[int]) -> List[date]:
+    """Data lub zakres dat z parametrów zapytania (HTTPException 400 przy błędzie)"""
+    try:
+        start = date(year, month, day)
+        end = start
+        if end_day is not None or end_month is not None or end_year is not None:
+            end = date(end_year or year, end_month or month, end_day or day)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Nieprawidłowa data: {e}")
+    if end < start:
+        raise HTTPException(status_code=400, detail="Data końcowa przed początkową")
+    if (end - start).days >= MAX_QUERY_DAYS:
+        raise HTTPException(status_code=400, detail=f"Zakres dłuższy niż {MAX_QUERY_DAYS} dni")
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+async def query_days(dates: List[date], query) -> List[dict]:
+    """
+    Wynik query(indeks) dla każdego dnia, w kolejności dat; wydarzenie
+    wielodniowe występuje raz (z pierwszego dnia)
+    
+    Niedostępne dni są pomijane; PageFetchError tylko, gdy nie udało się pobrać żadnego
+    """
+    by_date = {d: None if index is None else query(index) async for d, index in iter_days(dates, fetch_day=fetch_day_index)}
+    if all(by_date[d] is None for d in dates):
+        raise PageFetchError(DAY_UNAVAILABLE)
+    features = []
+    seen = set()
+    for d in dates:
+        for feature in by_date[d] or []:
+            link = feature["properties"]["link"]
+            if link not in seen:
+                seen.add(link)
+                features.append(feature)
+    return features
+
+
+@app.get("/api/events/near")
+async def get_events_near(lat: float, lon: float, day: int, month: int, year: int,
+                          radius: float = 1000, limit: Optional[int] = None,
+                          end_day: Optional[int] = None, end_month: Optional[int] = None,
+                          end_year: Optional[int] = None):
+    """
+    Wydarzenia w promieniu od punktu, od najbliższego
+    
+    Query params:
+    - lat, lon: środek
+    - radius: promień w metrach (domyślnie 1000, najwyżej MAX_RADIUS_M)
+    - day, month, year: data; end_day/end_month/end_year - koniec zakresu (opcjonalnie)
+    - limit: najwyżej tyle wydarzeń
+    
+    Returns:
+        GeoJSON FeatureCollection; properties.distance - odległość w metrach
+    """
+    if not 0 < radius <= MAX_RADIUS_M:
+        raise HTTPException(status_code=400, detail=f"Promień musi być w zakresie (0, {MAX_RADIUS_M}] m")
+    dates = parse_query_dates(day, month, year, end_day, end_month, end_year)
+    
+    def query(index: GridIndex) -> List[dict]:
+        return [{**feature, "properties": {**feature["properties"], "distance": round(distance)}}
+                for distance, feature in index.near(lat, lon, radius)]
+    
+    try:
+        features = await query_days(dates, query)
+    except PageFetchError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        logger.error(f"Błąd: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    features.sort(key=lambda feature: feature["properties"]["distance"])
+    if limit is not None:
+        features = features[:max(0, limit)]
+    return {"type": "FeatureCollection", "features": features}
+
+@app.get("/api/events/bbox")
+async def get_events_bbox(min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                          day: int, month: int, year: int,
+                          end_day: Optional[int] = None, end_month: Optional[int] = None,
+                          end_year: Optional[int] = None):
+    """
+    Wydarzenia w prostokącie (np. widok mapy: getBounds() w Leaflet)
+    
+    Query params:
+    - min_lat, min_lon, max_lat, max_lon: granice (włącznie)
+    - day, month, year: data; end_day/end_month/end_year - koniec zakresu (opcjonalnie)
+    
+    Returns:
+        GeoJSON FeatureCollection
+    """
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Nieprawidłowy prostokąt: min > max")
+    dates = parse_query_dates(day, month, year, end_day, end_month, end_year)
+    
+    try:
+        features = await query_days(dates, lambda index: index.bbox(min_lat, min_lon, max_lat, max_lon))
+    except PageFetchError as e:
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         logger.error(f"Błąd: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    return {"type": "FeatureCollection", "features": features}
+
+async def fetch_clusters(dates: List[date]) -> ZoomClusters:
+    """Klastry dla daty (z cache'u) lub zakresu dat (liczone z indeksów dni)"""
+    if len(dates) == 1:
+        clusters = cluster_cache.get(dates[0])
+        if clusters is not None:
+            return clusters
+        return await request_flight.do(
+            ("clusters", dates[0]), lambda: run_blocking(load_day_clusters, dates[0])
+        )
+    features = await query_days(dates, list)
+    return await run_blocking(ZoomClusters, features)
+
+
+@app.get("/api/events/clusters")
+async def get_event_clusters(zoom: int, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                             day: int, month: int, year: int,
+                             end_day: Optional[int] = None, end_month: Optional[int] = None,
+                             end_year: Optional[int] = None):
+    """
+    Klastry wydarzeń dla poziomu powiększenia i widoku mapy
+    
+    Query params:
+    - zoom: poziom powiększenia mapy
+    - min_lat, min_lon, max_lat, max_lon: widok mapy
+    - day, month, year: data; end_day/end_month/end_year - koniec zakresu (opcjonalnie)
+    
+    Returns:
+        GeoJSON FeatureCollection: klastry (properties.cluster, cluster_id, count)
+        i pojedyncze wydarzenia (jak w /api/events/geojson)
+    """
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Nieprawidłowy prostokąt: min > max")
+    dates = parse_query_dates(day, month, year, end_day, end_month, end_year)
+    
+    try:
+        clusters = await fetch_clusters(dates)
+    except PageFetchError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        logger.error(f"Błąd: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"type": "FeatureCollection", "features": clusters.query(zoom, min_lat, min_lon, max_lat, max_lon)}
+
+@app.get("/api/events/clusters/expand")
+async def expand_event_cluster(cluster_id: str, day: int, month: int, year: int,
+                               end_day: Optional[int] = None, end_month: Optional[int] = None,
+                               end_year: Optional[int] = None):
+    """
+    Wydarzenia klastra (te same parametry dat co przy /api/events/clusters)
+    
+    Returns:
+        GeoJSON FeatureCollection z wydarzeniami klastra oraz ids (linki wydarzeń)
+        i expansion_zoom - poziom, na którym klaster się rozpada
+    """
+    dates = parse_query_dates(day, month, year, end_day, end_month, end_year)
+    
+    try:
+        clusters = await fetch_clusters(dates)
+    except PageFetchError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        logger.error(f"Błąd: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    cluster = clusters.get(cluster_id)
+    if cluster is None:
+        raise HTTPException(status_code=404, detail=f"Nieznany klaster: {cluster_id}")
+    return {
+        "type": "FeatureCollection",
+        "cluster_id": cluster.id,
+        "expansion_zoom": clusters.expansion_zoom(cluster),
+        "ids": cluster.members,
+        "features": [clusters.features[link] for link in cluster.members],
+    }
+
+async def fetch_facets(dates: List[date]) -> Facets:
+    """Fasety dla daty (z cache'u) lub zakresu dat (liczone z indeksów dni)"""
+    if len(dates) == 1:
+        facets = facet_cache.get(dates[0])
+        if facets is not None:
+            return facets
+        return await request_flight.do(
+            ("facets", dates[0]), lambda: run_blocking(load_day_facets, dates[0])
+        )
+    return Facets(await query_days(dates, list))
+
+
+@app.get("/api/events/facets")
+async def get_event_facets(day: int, month: int, year: int,
+                           end_day: Optional[int] = None, end_month: Optional[int] = None,
+                           end_year: Optional[int] = None,
+                           district: List[str] = Query([]), category: List[str] = Query([])):
+    """
+    Liczba wydarzeń na mapie per dzielnica i kategoria
+    
+    Query params:
+    - day, month, year: data; end_day/end_month/end_year - koniec zakresu (opcjonalnie)
+    - district, category: liczyć tylko wydarzenia pasujące do filtrów
+    
+    Returns:
+        total oraz słowniki district i category (wartość -> liczba), malejąco;
+        wydarzenie wielodniowe liczone raz
+    """
+    dates = parse_query_dates(day, month, year, end_day, end_month, end_year)
+    try:
+        facets = await fetch_facets(dates)
+    except PageFetchError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        logger.error(f"Błąd: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "start_date": dates[0].isoformat(),
+        "end_date": dates[-1].isoformat(),
+        **facets.counts(facets.mask(district, category)),
+    }
+
+
+async def build_tile(dates: List[date], z: int, x: int, y: int, clusters: bool,
+                     district: List[str], category: List[str]) -> dict:
+    """FeatureCollection z wydarzeniami (lub klastrami poziomu z) kafelka"""
+    bounds = tile_bounds(z, x, y)
+    if clusters:
+        features = (await fetch_clusters(dates)).query(z, *bounds)
+    else:
+        features = await query_days(dates, lambda index: index.bbox(*bounds))
+        if district or category:
+            facets = await fetch_facets(dates)
+            mask = facets.mask(district, category)
+            features = [f for f in features if facets.contains(mask, f)]
+    return {"type": "FeatureCollection", "features": [f for f in features if in_tile(f, bounds)]}
+
+
+@app.get("/api/tiles/{z}/{x}/{y}")
+async def get_tile(z: int, x: int, y: int, day: int, month: int, year: int, request: Request,
+                   clusters: bool = False, end_day: Optional[int] = None,
+                   end_month: Optional[int] = None, end_year: Optional[int] = None,
+                   district: List[str] = Query([]), category: List[str] = Query([])):
+    """
+    Wydarzenia w kafelku Web Mercator z/x/y (jak kafelki mapy w Leaflet)
+    
+    Query params:
+    - day, month, year: data; end_day/end_month/end_year - koniec zakresu (opcjonalnie)
+    - clusters: true - klastry poziomu z zamiast pojedynczych wydarzeń
+    - district, category: filtry jak w /api/events/geojson (bez klastrów)
+    
+    Returns:
+        GeoJSON FeatureCollection (z ETagiem; 304 przy zgodnym If-None-Match).
+        Wydarzenie na krawędzi kafelków trafia tylko do jednego z nich.
+    """
+    if not 0 <= z <= MAX_TILE_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail=f"Nieprawidłowy kafelek: {z}/{x}/{y}")
+    if clusters and (district or category):
+        raise HTTPException(status_code=400, detail="Filtry nie są obsługiwane razem z clusters")
+    dates = parse_query_dates(day, month, year, end_day, end_month, end_year)
+    
+    # Kafelki zakresu dat nie są zapamiętywane - nie da się ich unieważnić per dzień
+    tiles = None
+    if len(dates) == 1:
+        tiles = tile_cache.get(dates[0])
+        if tiles is None:
+            tiles = ResponseCache(maxsize=TILES_PER_DATE, ttl=DAY_CACHE_TTL)
+            tile_cache.set(dates[0], tiles)
+    key = (z, x, y, clusters, tuple(sorted(district)), tuple(sorted(category)))
+    cached = tiles.get(key) if tiles else None
+    
+    if cached is None:
+        try:
+            payload = await build_tile(dates, z, x, y, clusters, district, category)
+        except PageFetchError as e:
+                raise HTTPException(status_code=502, detail=str(e))
+        except Exception as e:
+            logger.error(f"Błąd: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        # Po unieważnieniu daty w trakcie budowy kafelek trafia do porzuconego cache'u
+        cached = tiles.put(key, payload) if tiles else CachedResponse.from_payload(payload)
+    
+    return cached.to_response(request, media_type="application/geo+json")
 
 @app.get("/api/cache/stats", response_model=StatsResponse)
 async def get_cache_stats():
     """Statystyki cache'u"""
-    stats = geocoding_service.cache.get_stats()
-    return StatsResponse(**stats)
+    stats = await run_blocking(geocoding_service.get_stats)
+    stored = await run_blocking(parser.event_store.get_stats)
+    return StatsResponse(**stats, **stored,
+                         page_cache=parser.page_cache.get_stats(),
+                         geojson_cache=geojson_cache.get_stats(),
+                         coalescing={
+                             "requests": request_flight.get_stats(),
+                             "days": day_flight.get_stats(),
+                             "detail_pages": parser.address_flight.get_stats(),
+                         })
 
 @app.post("/api/cache/clear")
 async def clear_cache():
     """Wyczyść cache"""
     try:
-        import os
-        if os.path.exists("locations_cache.db"):
-            os.remove("locations_cache.db")
-        geocoding_service.cache._init_db()
+        # Bez usuwania pliku - pula trzyma otwarte połączenia do bazy
+        if not await run_blocking(geocoding_service.clear):
+            raise HTTPException(status_code=500, detail="Nie udało się wyczyścić cache'u")
+        # Współrzędne zapamiętane przy wydarzeniach też - inaczej wróciłyby z magazynu
+        if not await run_blocking(parser.forget_positions):
+            raise HTTPException(status_code=500, detail="Nie udało się wyczyścić współrzędnych")
+        # Współrzędne mogą się zmienić - gotowe odpowiedzi są nieaktualne
+        day_events_cache.clear()
+        geojson_cache.clear()
+        spatial_index_cache.clear()
+        cluster_cache.clear()
+        facet_cache.clear()
+        tile_cache.clear()
         return {"message": "Cache wyczyszczony"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """Metryki w formacie tekstowym Prometheusa"""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/prefetch/status")
+async def get_prefetch_status():
+    """Stan rozgrzewania nadchodzących dni"""
+    return prefetch_scheduler.get_status()
+
 @app.get("/health")
 async def health_check():
     """Health check"""
@@ -286,7 +992,15 @@ async def root():
         "endpoints": {
             "events": "/api/events?day=29&month=1&year=2026",
             "events_range": "/api/events-range?start_day=29&start_month=1&start_year=2026&end_day=5&end_month=2&end_year=2026",
+            "events_near": "/api/events/near?lat=52.23&lon=21.01&radius=1000&day=29&month=1&year=2026",
+            "events_bbox": "/api/events/bbox?min_lat=52.2&min_lon=20.95&max_lat=52.25&max_lon=21.05&day=29&month=1&year=2026",
+            "event_clusters": "/api/events/clusters?zoom=12&min_lat=52.1&min_lon=20.85&max_lat=52.37&max_lon=21.27&day=29&month=1&year=2026",
+            "tiles": "/api/tiles/12/2287/1348?day=29&month=1&year=2026",
+            "events_search": "/api/events/search?q=koncert&from=2026-01-01&to=2026-01-31",
+            "event_facets": "/api/events/facets?day=29&month=1&year=2026",
             "cache_stats": "/api/cache/stats",
+            "metrics": "/api/metrics",
+            "prefetch_status": "/api/prefetch/status",
             "docs": "/docs"
         }
     }
@@ -0,0 +1,110 @@
+"""
+Harmonogram wstępnego pobierania (rozgrzewania cache'u) nadchodzących dni
+"""
+
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import Executor
+from datetime import date, timedelta
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchScheduler:
+    """Okresowo odświeża dzisiejszy dzień i kolejne dni w tle"""
+
+    def __init__(self, refresh: Callable[[date], int], horizon_days: int = 3,
+                 interval: float = 30 * 60, jitter: float = 60, max_concurrency: int = 2,
+                 executor: Optional[Executor] = None):
+        """
+        Args:
+            refresh: blokująca funkcja pobierająca dzień do cache'u, zwraca liczbę wydarzeń
+            horizon_days: ile dni po dzisiejszym rozgrzewać
+            interval: odstęp między kolejnymi odświeżeniami (s)
+            jitter: losowe przesunięcie startu i odstępu (s) - rozkłada ruch między workerami
+            max_concurrency: ile dni pobierać równocześnie
+            executor: pula wątków dla refresh (None = domyślna pula asyncio)
+        """
+        self.refresh = refresh
+        self.horizon_days = horizon_days
+        self.interval = interval
+        self.jitter = jitter
+        self.max_concurrency = max(1, max_concurrency)
+        self.executor = executor
+        self._status: Dict[date, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def dates(self):
+        """Daty objęte rozgrzewaniem"""
+        today = date.today()
+        return [today + timedelta(days=i) for i in range(self.horizon_days + 1)]
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Prefetch: start (dni: {self.horizon_days + 1}, co {self.interval:.0f} s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        await asyncio.sleep(random.uniform(0, self.jitter))
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval + random.uniform(0, self.jitter))
+
+    async def run_once(self):
+        """Jedno odświeżenie wszystkich dni (z limitem równoległości)"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        dates = self.dates()
+        await asyncio.gather(*(self._refresh_date(d, semaphore) for d in dates))
+
+        # Dni, które wypadły z horyzontu, nie są już rozgrzewane
+        for old in [d for d in self._status if d < dates[0]]:
+            del self._status[old]
+
+    async def _refresh_date(self, event_date: date, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            started = time.monotonic()
+            status = self._status.setdefault(event_date, {"refreshed_at": None, "events": 0})
+            try:
+                loop = asyncio.get_running_loop()
+                status["events"] = await loop.run_in_executor(self.executor, self.refresh, event_date)
+                status["refreshed_at"] = time.time()
+                status["error"] = None
+            except Exception as e:
+                logger.error(f"Prefetch {event_date}: {e}")
+                status["error"] = str(e)
+            status["duration"] = round(time.monotonic() - started, 3)
+
+    def get_status(self) -> dict:
+        """Które daty są rozgrzane i jak stare są dane"""
+        now = time.time()
+        dates = []
+        for event_date in self.dates():
+            status = self._status.get(event_date, {})
+            refreshed_at = status.get("refreshed_at")
+            age = round(now - refreshed_at, 1) if refreshed_at else None
+            dates.append({
+                "date": event_date.isoformat(),
+                "warm": age is not None and age < self.interval + self.jitter,
+                "age_seconds": age,
+                "events": status.get("events", 0),
+                "duration": status.get("duration"),
+                "error": status.get("error"),
+            })
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "horizon_days": self.horizon_days,
+            "interval": self.interval,
+            "dates": dates,
+        }
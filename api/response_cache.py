@@ -0,0 +1,74 @@
+"""
+Cache gotowych (zserializowanych i skompresowanych) odpowiedzi API
+"""
+
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Hashable, Optional
+
+from fastapi import Request, Response
+
+from logic.memory_cache import MemoryCache
+
+
+@dataclass
+class CachedResponse:
+    """Zserializowana odpowiedź z wersją skompresowaną i ETagiem"""
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+    @classmethod
+    def from_payload(cls, payload) -> "CachedResponse":
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        return cls(body=body, gzipped=gzip.compress(body, compresslevel=6), etag=etag)
+
+    def to_response(self, request: Request, media_type: str = "application/json") -> Response:
+        """
+        Odpowiedź HTTP: 304 przy zgodnym If-None-Match, gzip jeśli klient go akceptuje
+        """
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = request.headers.get("if-none-match", "")
+        if self.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=self.gzipped, media_type=media_type, headers=headers)
+        return Response(content=self.body, media_type=media_type, headers=headers)
+
+
+class ResponseCache:
+    """Odpowiedzi trzymane w pamięci per klucz (np. data) z TTL"""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 10 * 60):
+        self._cache = MemoryCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        return self._cache.get(key)
+
+    def put(self, key: Hashable, payload) -> CachedResponse:
+        """Serializuj i zapamiętaj odpowiedź"""
+        entry = CachedResponse.from_payload(payload)
+        self.set(key, entry)
+        return entry
+
+    def set(self, key: Hashable, entry: CachedResponse) -> None:
+        """Zapamiętaj gotową (zserializowaną) odpowiedź"""
+        self._cache.set(key, entry)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._cache.delete(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def get_stats(self) -> dict:
+        return self._cache.get_stats()
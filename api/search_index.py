@@ -0,0 +1,134 @@
+"""
+Indeks odwrócony wydarzeń (tytuł, kategorie, dzielnica, adres) z filtrem dat
+"""
+
+import bisect
+import re
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from logic.address import NON_GEOCODABLE, fold
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Słowa po złożeniu wielkości liter i polskich znaków ("Dla Dzieci" -> ["dla", "dzieci"])"""
+    return _TOKEN.findall(fold(text)) if text else []
+
+
+def _parse_day(text: Optional[str]) -> Optional[date]:
+    try:
+        return datetime.strptime(text, "%d.%m.%Y").date() if text else None
+    except ValueError:
+        return None
+
+
+def event_days(event) -> Optional[Tuple[date, date]]:
+    """Pierwszy i ostatni dzień wydarzenia (date albo start_date - end_date)"""
+    start = _parse_day(event.start_date) or _parse_day(event.date)
+    end = _parse_day(event.end_date) or start
+    if start is None:
+        return None
+    return start, max(start, end)
+
+
+class SearchIndex:
+    """
+    Słowo -> permalinki wydarzeń; aktualizowany przyrostowo (ponowne dodanie
+    wydarzenia zastępuje jego poprzednią wersję)
+
+    Każde słowo zapytania musi pasować do początku któregoś słowa wydarzenia
+    ("koncert" znajduje też "koncerty"), więc słownik jest trzymany posortowany.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._events: Dict[str, object] = {}
+        self._tokens: Dict[str, Set[str]] = {}
+        self._days: Dict[str, Optional[Tuple[date, date]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    @staticmethod
+    def _event_tokens(event) -> Set[str]:
+        tokens = set(tokenize(event.title))
+        tokens.update(tokenize(event.district))
+        for category in event.box_category or []:
+            tokens.update(tokenize(category))
+        if event.address not in NON_GEOCODABLE:
+            tokens.update(tokenize(event.address))
+        return tokens
+
+    def _remove(self, plink: str):
+        for token in self._tokens.pop(plink, ()):
+            postings = self._postings[token]
+            postings.discard(plink)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+        self._events.pop(plink, None)
+        self._days.pop(plink, None)
+
+    def add_many(self, events: Iterable) -> int:
+        """Dodaj lub zaktualizuj wydarzenia (EventBox); zwraca ich liczbę"""
+        count = 0
+        with self._lock:
+            for event in events:
+                self._remove(event.plink)
+                tokens = self._event_tokens(event)
+                for token in tokens:
+                    postings = self._postings.get(token)
+                    if postings is None:
+                        postings = self._postings[token] = set()
+                        bisect.insort(self._vocabulary, token)
+                    postings.add(event.plink)
+                self._tokens[event.plink] = tokens
+                self._events[event.plink] = event
+                self._days[event.plink] = event_days(event)
+                count += 1
+        return count
+
+    def _matching(self, prefix: str) -> Set[str]:
+        """Permalinki wydarzeń ze słowem zaczynającym się od prefix"""
+        found = set()
+        i = bisect.bisect_left(self._vocabulary, prefix)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(prefix):
+            found |= self._postings[self._vocabulary[i]]
+            i += 1
+        return found
+
+    def search(self, query: str, start: Optional[date] = None, end: Optional[date] = None,
+               limit: Optional[int] = None) -> List:
+        """
+        Wydarzenia pasujące do wszystkich słów zapytania, trwające choć jeden
+        dzień w [start, end]; posortowane po dacie rozpoczęcia i tytule
+        """
+        tokens = sorted(set(tokenize(query)), key=len, reverse=True)
+        if not tokens:
+            return []
+        with self._lock:
+            # Najdłuższe (najrzadsze) słowa najpierw - mniejsze zbiory pośrednie
+            found = self._matching(tokens[0])
+            for token in tokens[1:]:
+                if not found:
+                    break
+                found &= self._matching(token)
+
+            results = []
+            for plink in found:
+                days = self._days[plink]
+                if start or end:
+                    if days is None:
+                        continue
+                    if (start and days[1] < start) or (end and days[0] > end):
+                        continue
+                results.append((days[0] if days else date.max, self._events[plink]))
+
+        results.sort(key=lambda pair: (pair[0], pair[1].title))
+        events = [event for _, event in results]
+        return events[:limit] if limit is not None else events
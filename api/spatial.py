@@ -0,0 +1,92 @@
+"""
+Indeks przestrzenny (siatka stałych komórek) dla zapytań o promień i prostokąt
+"""
+
+import math
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+EARTH_RADIUS_M = 6_371_000
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Odległość po kole wielkim (m)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class GridIndex:
+    """
+    Punkty w komórkach siatki (domyślnie 0.01° ≈ 1.1 x 0.7 km w Warszawie)
+
+    Zapytanie sprawdza tylko komórki przecinające obszar, więc koszt zależy
+    od liczby punktów w pobliżu, a nie od wielkości całego zbioru.
+    """
+
+    def __init__(self, cell_size: float = 0.01):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[Tuple[float, float, Any]]] = defaultdict(list)
+        self._size = 0
+
+    @classmethod
+    def from_features(cls, features: Iterable[dict], cell_size: float = 0.01) -> "GridIndex":
+        """Indeks GeoJSON Feature (Point) - elementem jest sam feature"""
+        index = cls(cell_size)
+        for feature in features:
+            lon, lat = feature["geometry"]["coordinates"]
+            index.insert(lat, lon, feature)
+        return index
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    def insert(self, lat: float, lon: float, item: Any) -> None:
+        self._cells[self._cell(lat, lon)].append((lat, lon, item))
+        self._size += 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Any]:
+        for points in self._cells.values():
+            for _, _, item in points:
+                yield item
+
+    def _candidates(self, min_lat: float, min_lon: float,
+                    max_lat: float, max_lon: float) -> Iterator[Tuple[float, float, Any]]:
+        """Punkty z komórek przecinających prostokąt (także nieco spoza niego)"""
+        row_min, col_min = self._cell(min_lat, min_lon)
+        row_max, col_max = self._cell(max_lat, max_lon)
+        if (row_max - row_min + 1) * (col_max - col_min + 1) > len(self._cells):
+            # Obszar większy niż zajęte komórki - taniej przejrzeć tylko zajęte
+            for (row, col), points in self._cells.items():
+                if row_min <= row <= row_max and col_min <= col <= col_max:
+                    yield from points
+            return
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                points = self._cells.get((row, col))
+                if points:
+                    yield from points
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[Any]:
+        """Elementy w prostokącie (granice włącznie)"""
+        return [item for lat, lon, item in self._candidates(min_lat, min_lon, max_lat, max_lon)
+                if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon]
+
+    def near(self, lat: float, lon: float, radius_m: float) -> List[Tuple[float, Any]]:
+        """(odległość w m, element) w promieniu, od najbliższego"""
+        # Prostokąt opisany na okręgu (z zapasem - równoleżnik to nie koło wielkie)
+        dlat = radius_m / METERS_PER_DEGREE
+        dlon = 1.01 * radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        found = []
+        for plat, plon, item in self._candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon):
+            distance = haversine_m(lat, lon, plat, plon)
+            if distance <= radius_m:
+                found.append((distance, item))
+        found.sort(key=lambda pair: pair[0])
+        return found
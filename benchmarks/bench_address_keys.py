@@ -0,0 +1,45 @@
+"""
+Benchmark: trafienia w cache geokodowania - surowe adresy vs klucze kanoniczne
+
+Liczy, ile zapytań do ArcGIS wymaga korpus adresów, gdy kluczem cache'u
+jest surowy tekst, a ile po canonical_key.
+
+Uruchomienie (z katalogu głównego):
+    python -m benchmarks.bench_address_keys [plik_z_adresami]
+"""
+
+import sys
+from pathlib import Path
+
+from logic.address import canonical_key
+
+CORPUS = Path(__file__).parent / "fixtures" / "addresses.txt"
+
+
+def hit_rate(keys) -> tuple:
+    """(liczba zapytań do usługi, odsetek trafień) dla sekwencji kluczy"""
+    seen = set()
+    misses = 0
+    for key in keys:
+        if key not in seen:
+            seen.add(key)
+            misses += 1
+    return misses, 1 - misses / len(keys)
+
+
+def main():
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else CORPUS
+    addresses = [line.strip() for line in path.read_text(encoding="utf-8").splitlines()
+                 if line.strip() and not line.startswith("#")]
+
+    raw_misses, raw_rate = hit_rate(addresses)
+    canonical_misses, canonical_rate = hit_rate([canonical_key(a) for a in addresses])
+
+    print(f"adresów w korpusie: {len(addresses)}")
+    print(f"{'klucz':<12} {'geokodowań':>11} {'trafienia':>10}")
+    print(f"{'surowy':<12} {raw_misses:>11} {raw_rate:>9.1%}")
+    print(f"{'kanoniczny':<12} {canonical_misses:>11} {canonical_rate:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Test obciążeniowy: opóźnienie /health podczas równoległych zapytań o dni
+
+Uruchamia API (uvicorn) z parserem skierowanym na lokalną atrapę waw4free.pl,
+wysyła kilka zapytań /api/events/geojson o różne (zimne) dni i w tym czasie
+co chwilę odpytuje /health. Przy scrapingu poza pętlą zdarzeń opóźnienie
+/health powinno pozostać na poziomie pojedynczych milisekund.
+
+Uruchomienie (z katalogu głównego):
+    python -m benchmarks.bench_event_loop
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import requests
+
+from benchmarks.stub_server import StubGeocoder, StubServer
+
+
+def start_api(port: int):
+    """Uruchamia api.main w wątku (bazy cache'u w katalogu tymczasowym)"""
+    import uvicorn
+
+    os.environ.setdefault("PREFETCH_ENABLED", "0")
+    os.chdir(tempfile.mkdtemp(prefix="geo-app-bench-"))
+    import api.main as main
+
+    config = uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return main, server
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--days", type=int, default=6, help="liczba równoległych zapytań o dni")
+    ap.add_argument("--boxes", type=int, default=30)
+    ap.add_argument("--latency", type=float, default=0.1, help="opóźnienie atrapy waw4free (s)")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    sys.path.insert(0, os.getcwd())
+    with StubServer(boxes=args.boxes, latency=args.latency) as stub:
+        api, server = start_api(args.port)
+        api.parser.base_url = stub.base_url
+        api.parser.geocoder = StubGeocoder(latency=0.02)
+        base = f"http://127.0.0.1:{args.port}"
+
+        def health_latencies(stop: threading.Event, out: list):
+            while not stop.is_set():
+                start = time.perf_counter()
+                requests.get(f"{base}/health", timeout=30)
+                out.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.02)
+
+        idle = []
+        stop = threading.Event()
+        probe = threading.Thread(target=health_latencies, args=(stop, idle))
+        probe.start()
+        time.sleep(1)
+        stop.set()
+        probe.join()
+
+        busy = []
+        stop = threading.Event()
+        probe = threading.Thread(target=health_latencies, args=(stop, busy))
+        probe.start()
+
+        start = time.perf_counter()
+        first = date(2026, 1, 1)
+        workers = []
+        for i in range(args.days):
+            d = first + timedelta(days=i)
+            url = f"{base}/api/events/geojson?day={d.day}&month={d.month}&year={d.year}"
+            t = threading.Thread(target=requests.get, args=(url,), kwargs={"timeout": 300})
+            t.start()
+            workers.append(t)
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        probe.join()
+        server.should_exit = True
+
+    print(f"{args.days} dni x {args.boxes} wydarzeń, atrapa {args.latency * 1000:.0f} ms: {elapsed:.2f} s")
+    print(f"{'/health':<10} {'n':>5} {'p50 [ms]':>9} {'p95 [ms]':>9} {'max [ms]':>9}")
+    for name, values in (("bezczynny", idle), ("obciążony", busy)):
+        print(f"{name:<10} {len(values):>5} {statistics.median(values):>9.1f} "
+              f"{percentile(values, 0.95):>9.1f} {max(values):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
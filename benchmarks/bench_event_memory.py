@@ -0,0 +1,110 @@
+"""
+Benchmark: pamięć zajmowana przez wydarzenia - dataclass vs EventBox ze slotami
+
+Buduje N wydarzeń tak, jak robi to parser (każdy napis to osobny obiekt
+wycięty z HTML), raz jako dawny dataclass, raz jako obecny EventBox,
+i mierzy tracemalloc przyrost pamięci oraz czas to_dict.
+
+Uruchomienie (z katalogu głównego):
+    python -m benchmarks.bench_event_memory [--events 10000]
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+from logic.address import DISTRICTS
+from logic.parser_update import BASE_URL, EventBox
+
+CATEGORIES = ["koncerty", "dla dzieci", "wystawy", "spotkania", "film", "teatr",
+              "warsztaty", "sport", "festiwale", "wykłady"]
+
+
+@dataclass
+class LegacyEventBox:
+    """EventBox sprzed zmiany (dataclass z __dict__, pełne adresy, lista kategorii)"""
+    title: str
+    image: str
+    district: Optional[str]
+    address: Optional[str]
+    plink: str
+    box_category: List[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    date: Optional[str] = None
+    time: Optional[str] = None
+    position: Optional[tuple[float, float]] = None
+
+    def to_dict(self):
+        data = asdict(self)
+        if data['position'] is not None:
+            data['position'] = {'latitude': data['position'][0], 'longitude': data['position'][1]}
+        return data
+
+
+def _fresh(text: str) -> str:
+    """Kopia napisu jako nowy obiekt (jak tekst wycięty z drzewa HTML)"""
+    return "".join(list(text))
+
+
+def raw_events(count: int, seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        day = f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2026"
+        events.append(dict(
+            title=f"Wydarzenie numer {i} - {rng.choice(CATEGORIES)} w Warszawie",
+            image=f"{BASE_URL}obrazki/wydarzenia/{i}-miniatura.jpg",
+            district=_fresh(rng.choice(DISTRICTS)),
+            address=f"ul. Przykładowa {rng.randint(1, 200)}, Warszawa",
+            plink=f"{BASE_URL}wydarzenie-{100000 + i}-wydarzenie-numer-{i}",
+            box_category=[_fresh(c) for c in rng.sample(CATEGORIES, rng.randint(1, 3))],
+            date=day,
+            time=f"{rng.randint(8, 22)}:00",
+            position=(52.2 + rng.random() / 10, 21.0 + rng.random() / 10),
+        ))
+    return events
+
+
+def measure(cls, count: int) -> tuple:
+    """(bajtów na wydarzenie, czas to_dict na wydarzenie w µs)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    data = raw_events(count)
+    events = [cls(**fields) for fields in data]
+    # Zostaje to, co trzymają same wydarzenia (napisy, kontenery kategorii)
+    del data
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for event in events:
+        event.to_dict()
+    elapsed = time.perf_counter() - start
+    return size / count, elapsed / count * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--events", type=int, default=10000)
+    args = ap.parse_args()
+
+    legacy_size, legacy_time = measure(LegacyEventBox, args.events)
+    size, to_dict_time = measure(EventBox, args.events)
+
+    print(f"wydarzeń: {args.events}")
+    print(f"{'klasa':<16} {'B/wydarzenie':>13} {'razem [MB]':>11} {'to_dict [µs]':>13}")
+    for name, per_event, per_dict in (("dataclass", legacy_size, legacy_time),
+                                      ("EventBox", size, to_dict_time)):
+        print(f"{name:<16} {per_event:>13.0f} {per_event * args.events / 2**20:>11.2f} {per_dict:>13.2f}")
+    print(f"oszczędność pamięci: {1 - size / legacy_size:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark /api/events-range: czas do pierwszego bajtu, czas całkowity
+i szczytowe zużycie pamięci dla zakresów 7/30/90 dni
+
+Uruchomienie (z katalogu głównego):
+    python -m benchmarks.bench_events_range
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import requests
+
+from benchmarks.bench_event_loop import start_api
+from benchmarks.stub_server import StubGeocoder, StubServer
+
+
+def measure(url: str):
+    """(TTFB [s], czas całkowity [s], bajty, szczyt pamięci [MiB])"""
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    ttfb = None
+    size = 0
+    with requests.get(url, stream=True, timeout=600) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=None):
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+            size += len(chunk)
+    total = time.perf_counter() - start
+    return ttfb or total, total, size, tracemalloc.get_traced_memory()[1] / 2 ** 20
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--ranges", type=int, nargs="+", default=[7, 30, 90])
+    ap.add_argument("--boxes", type=int, default=40)
+    ap.add_argument("--latency", type=float, default=0.01, help="opóźnienie atrapy waw4free (s)")
+    ap.add_argument("--port", type=int, default=8766)
+    args = ap.parse_args()
+
+    sys.path.insert(0, os.getcwd())
+    tracemalloc.start()
+    with StubServer(boxes=args.boxes, latency=args.latency) as stub:
+        api, server = start_api(args.port)
+        api.parser.base_url = stub.base_url
+        api.parser.geocoder = StubGeocoder(latency=0)
+
+        print(f"{'dni':>4} {'format':<8} {'TTFB [s]':>9} {'całość [s]':>11} {'MiB odp.':>9} {'szczyt MiB':>11}")
+        start = date(2026, 1, 1)
+        for days in args.ranges:
+            end = start + timedelta(days=days - 1)
+            for fmt in ("json", "ndjson", "geojson"):
+                # Zimny cache dni - każdy format pobiera zakres od nowa
+                api.day_events_cache.clear()
+                url = (f"http://127.0.0.1:{args.port}/api/events-range?"
+                       f"start_day={start.day}&start_month={start.month}&start_year={start.year}&"
+                       f"end_day={end.day}&end_month={end.month}&end_year={end.year}&format={fmt}")
+                ttfb, total, size, peak = measure(url)
+                print(f"{days:>4} {fmt:<8} {ttfb:>9.2f} {total:>11.2f} {size / 2 ** 20:>9.2f} {peak:>11.1f}")
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark parsowania HTML: pełne drzewo vs SoupStrainer, dla dostępnych backendów
+
+Dla stron dnia (boxy wydarzeń) i stron wydarzeń (adres) mierzy średni czas
+parsowania i szczytową pamięć (tracemalloc) na stronę.
+
+Uruchomienie (z katalogu głównego):
+    python -m benchmarks.bench_html_parse [katalog_z_zapisanymi_stronami]
+
+Zapisane strony (*.html) zawierające itemprop="location" są traktowane jako
+strony wydarzeń, pozostałe jako strony dnia. Bez katalogu używane są strony
+generowane przez atrapę waw4free.
+"""
+
+import argparse
+import importlib.util
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from benchmarks.stub_server import render_day, render_detail
+from logic.parser_update import BOX_STRAINER, LOCATION_STRAINER
+
+
+def load_pages(directory, boxes: int, details: int):
+    """(strony dnia, strony wydarzeń)"""
+    if directory is None:
+        return [render_day(boxes)], [render_detail(i) for i in range(details)]
+    day, detail = [], []
+    for path in sorted(Path(directory).glob("*.html")):
+        html = path.read_text(encoding="utf-8")
+        (detail if 'itemprop="location"' in html else day).append(html)
+    return day, detail
+
+
+def measure(pages, backend: str, strainer, repeat: int):
+    """(ms na stronę, szczyt pamięci KiB na stronę, wynik kontrolny)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            BeautifulSoup(html, backend, parse_only=strainer)
+    elapsed = (time.perf_counter() - start) / (repeat * len(pages))
+
+    peaks = []
+    found = 0
+    for html in pages:
+        tracemalloc.start()
+        soup = BeautifulSoup(html, backend, parse_only=strainer)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        found += len(soup.find_all("div", class_="box")) + len(soup.find_all(attrs={"itemprop": "location"}))
+    return elapsed * 1000, sum(peaks) / len(peaks) / 1024, found
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("pages", nargs="?", help="katalog z zapisanymi stronami *.html")
+    ap.add_argument("--boxes", type=int, default=60, help="boxów na generowanej stronie dnia")
+    ap.add_argument("--details", type=int, default=20, help="liczba generowanych stron wydarzeń")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    day_pages, detail_pages = load_pages(args.pages, args.boxes, args.details)
+    backends = ["html.parser"] + [name for name in ("lxml",) if importlib.util.find_spec(name)]
+
+    print(f"stron dnia: {len(day_pages)}, stron wydarzeń: {len(detail_pages)}")
+    print(f"{'strona':<10} {'backend':<12} {'drzewo':<9} {'ms/strona':>10} {'KiB/strona':>11} {'elementy':>9}")
+    for kind, pages, strainer in (("dzień", day_pages, BOX_STRAINER),
+                                  ("wydarzenie", detail_pages, LOCATION_STRAINER)):
+        if not pages:
+            continue
+        for backend in backends:
+            for label, parse_only in (("pełne", None), ("strainer", strainer)):
+                ms, kib, found = measure(pages, backend, parse_only, args.repeat)
+                print(f"{kind:<10} {backend:<12} {label:<9} {ms:>10.2f} {kib:>11.0f} {found:>9}")
+
+
+if __name__ == "__main__":
+    main()
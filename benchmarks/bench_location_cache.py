@@ -0,0 +1,68 @@
+"""
+Benchmark: odczyty z LocationCache na sekundę (ciepły cache)
+
+Porównuje dawny wzorzec (nowe połączenie SQLite przy każdym odczycie)
+z pulą połączeń oraz zbiorczym get_many.
+
+Uruchomienie (z katalogu głównego):
+    python -m benchmarks.bench_location_cache
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from api.database import LocationCache
+
+
+def get_connect_per_call(db_path: str, address: str):
+    """Odczyt jak przed pulą połączeń: connect + SELECT + zamknięcie"""
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT latitude, longitude FROM locations WHERE address = ?", (address,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+    finally:
+        conn.close()
+
+
+def rate(fn, n: int) -> float:
+    start = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--addresses", type=int, default=500)
+    ap.add_argument("--lookups", type=int, default=20000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        cache = LocationCache(db_path)
+        addresses = [f"Marszałkowska {i}" for i in range(args.addresses)]
+        cache.save_many({a: (52.2 + i * 1e-4, 21.0) for i, a in enumerate(addresses)})
+        keys = [addresses[i % len(addresses)] for i in range(args.lookups)]
+
+        results = {
+            "connect per call": rate(lambda: [get_connect_per_call(db_path, k) for k in keys], len(keys)),
+            "pooled get": rate(lambda: [cache.get(k) for k in keys], len(keys)),
+            # get_many deduplikuje klucze, więc odpytujemy paczki unikalnych adresów
+            "pooled get_many": rate(
+                lambda: [cache.get_many(addresses) for _ in range(len(keys) // len(addresses))],
+                len(keys) // len(addresses) * len(addresses)
+            ),
+        }
+        cache.close()
+
+    baseline = results["connect per call"]
+    for name, per_second in results.items():
+        print(f"{name:<18} {per_second:>12,.0f} lookups/s {per_second / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
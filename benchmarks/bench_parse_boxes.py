@@ -0,0 +1,39 @@
+"""
+Benchmark: czas get_events_from_date w zależności od rozmiaru puli wątków
+
+Uruchomienie (z katalogu głównego):
+    python -m benchmarks.bench_parse_boxes
+"""
+
+import argparse
+import time
+
+from benchmarks.stub_server import StubGeocoder, StubServer
+from logic.parser_update import Waw4FreeParser
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--boxes", type=int, default=60)
+    ap.add_argument("--latency", type=float, default=0.05, help="opóźnienie serwera (s)")
+    ap.add_argument("--geocode-latency", type=float, default=0.05)
+    ap.add_argument("--pools", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = ap.parse_args()
+
+    with StubServer(boxes=args.boxes, latency=args.latency) as server:
+        print(f"{'workers':>8} {'events':>7} {'time [s]':>9} {'speedup':>8}")
+        baseline = None
+        for workers in args.pools:
+            parser = Waw4FreeParser(base_url=server.base_url, max_workers=workers,
+                                    geocoder=StubGeocoder(args.geocode_latency))
+
+            start = time.perf_counter()
+            events = parser.get_events_from_date(29, 1, 2026)
+            elapsed = time.perf_counter() - start
+
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {len(events):>7} {elapsed:>9.2f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
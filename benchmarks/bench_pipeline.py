@@ -0,0 +1,226 @@
+"""
+Benchmark potoku scraping -> geokodowanie -> serializacja na atrapach usług
+
+Mierzy osobno każdy etap oraz całość (zimny i rozgrzany cache):
+    get_page     - pobranie i parsowanie strony dnia (_get_page)
+    parse_boxes  - boxy strony dnia ze stronami wydarzeń, bez geokodowania
+    get_address  - adresy ze stron wydarzeń (_get_address)
+    geocode      - GeocodingService.geocode (atrapa ArcGIS zamiast HTTP)
+    geojson      - build_geojson z api/main.py + serializacja odpowiedzi
+    end_to_end   - get_events_from_date + GeoJSON
+
+Strony pochodzą z benchmarks/fixtures/pages (benchmarks/record_pages.py),
+a jeśli katalog jest pusty - z generatora atrapy. Wynik w JSON (--output)
+można porównać z wynikiem innego commita (--compare).
+
+Uruchomienie (z katalogu głównego):
+    python -m benchmarks.bench_pipeline --output wynik.json
+    python -m benchmarks.bench_pipeline --compare wynik.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urljoin
+
+from benchmarks.record_pages import PAGES_DIR
+from benchmarks.stub_server import StubArcGIS, StubServer
+from logic.event_store import EventStore
+from logic.page_cache import PageCache
+from logic.parser_update import BOX_STRAINER, Waw4FreeParser
+
+DAY = (29, 1, 2026)
+
+
+class Pipeline:
+    """Parser z pustymi cache'ami w katalogu tymczasowym"""
+
+    def __init__(self, base_url: str, workers: int, geocode_latency: float):
+        directory = tempfile.mkdtemp(prefix="geo-app-bench-")
+        from api.geocoding_service import GeocodingService
+
+        self.geocoding = GeocodingService(cache_db=os.path.join(directory, "locations_cache.db"),
+                                          min_delay_seconds=0)
+        self.geocoding.geocoder = StubArcGIS(latency=geocode_latency)
+        self.parser = Waw4FreeParser(
+            base_url=base_url, max_workers=workers,
+            page_cache=PageCache(os.path.join(directory, "pages_cache.db")),
+            event_store=EventStore(os.path.join(directory, "events_store.db")),
+            geocoder=self.geocoding,
+        )
+        self.day_url = f"{base_url}warszawa-wydarzenia-{DAY[2]}-{DAY[1]}-{DAY[0]}"
+
+    def close(self):
+        self.geocoding.cache.close()
+
+
+def stage_functions(fixtures: dict):
+    """Etap -> (przygotowanie(pipeline), pomiar(pipeline, stan)) -> liczba elementów"""
+    from api.main import build_geojson
+    from api.response_cache import ResponseCache
+
+    def get_page(p, _):
+        soup = p.parser._get_page(p.day_url, max_age=p.parser._day_ttl, parse_only=BOX_STRAINER)
+        return len(soup.find_all("div", class_="box"))
+
+    def parse_boxes_setup(p):
+        p.parser.geocode = False
+        return p.parser._get_page(p.day_url, parse_only=BOX_STRAINER)
+
+    def parse_boxes(p, soup):
+        return len(p.parser.parse_boxes(soup))
+
+    def get_address(p, _):
+        return len([p.parser._get_address(url) for url in fixtures["detail_urls"]])
+
+    def geocode(p, _):
+        return len([p.geocoding.geocode(address) for address in fixtures["addresses"]])
+
+    def geojson_setup(p):
+        return ResponseCache()
+
+    def geojson(p, cache):
+        entry = cache.get("day")
+        if entry is None:
+            entry = cache.put("day", build_geojson(fixtures["events"]))
+        return len(entry.body)
+
+    def end_to_end(p, _):
+        events = p.parser.get_events_from_date(*DAY)
+        build_geojson(events)
+        return len(events)
+
+    none = lambda p: None
+    return {
+        "get_page": (none, get_page),
+        "parse_boxes": (parse_boxes_setup, parse_boxes),
+        "get_address": (none, get_address),
+        "geocode": (none, geocode),
+        "geojson": (geojson_setup, geojson),
+        "end_to_end": (none, end_to_end),
+    }
+
+
+def summarize(samples) -> dict:
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "min_ms": round(min(samples) * 1000, 3),
+    }
+
+
+def run_stage(new_pipeline, setup, measure, repeat: int) -> dict:
+    """Zimny cache: nowy potok w każdym powtórzeniu; rozgrzany: ten sam po pierwszym przebiegu"""
+    cold, warm = [], []
+    items = 0
+    for _ in range(repeat):
+        pipeline = new_pipeline()
+        state = setup(pipeline)
+        start = time.perf_counter()
+        items = measure(pipeline, state)
+        cold.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        measure(pipeline, state)
+        warm.append(time.perf_counter() - start)
+        pipeline.close()
+    return {"items": items, "cold": summarize(cold), "warm": summarize(warm)}
+
+
+def load_fixtures(new_pipeline) -> dict:
+    """Adresy i wydarzenia dnia (wejście dla etapów mierzonych w izolacji)"""
+    pipeline = new_pipeline()
+    soup = pipeline.parser._get_page(pipeline.day_url, parse_only=BOX_STRAINER)
+    detail_urls = [urljoin(pipeline.parser.base_url, a["href"])
+                   for a in soup.select("div.box a[href]")]
+    events = pipeline.parser.get_events_from_date(*DAY)
+    addresses = [e.address for e in events if getattr(e, "address", None)]
+    pipeline.close()
+    return {"detail_urls": list(dict.fromkeys(detail_urls)), "addresses": addresses, "events": events}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(result: dict, baseline_path: Path, threshold: float) -> bool:
+    """Wypisuje stosunek median do wyniku bazowego; True, jeśli jest regresja"""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    print(f"\nporównanie z {baseline.get('commit')} (próg {threshold:.2f}x)")
+    regression = False
+    for name, stage in result["stages"].items():
+        base = baseline["stages"].get(name)
+        if not base:
+            continue
+        for mode in ("cold", "warm"):
+            ratio = stage[mode]["median_ms"] / max(base[mode]["median_ms"], 1e-6)
+            flag = " REGRESJA" if ratio > threshold else ""
+            regression |= bool(flag)
+            print(f"{name:<12} {mode:<5} {base[mode]['median_ms']:>10.2f} -> "
+                  f"{stage[mode]['median_ms']:>10.2f} ms {ratio:>6.2f}x{flag}")
+    return regression
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pages", type=Path, default=PAGES_DIR, help="katalog z zapisanymi stronami")
+    ap.add_argument("--boxes", type=int, default=40, help="boxów na stronie generowanej przez atrapę")
+    ap.add_argument("--latency", type=float, default=0.005, help="opóźnienie atrapy waw4free (s)")
+    ap.add_argument("--geocode-latency", type=float, default=0.005, help="opóźnienie atrapy ArcGIS (s)")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--output", type=Path, help="zapisz wynik JSON do pliku")
+    ap.add_argument("--compare", type=Path, help="wynik JSON innego commita")
+    ap.add_argument("--threshold", type=float, default=1.2, help="próg regresji (stosunek median)")
+    args = ap.parse_args()
+
+    logging.disable(logging.WARNING)
+    sys.path.insert(0, os.getcwd())
+    pages_dir = args.pages.resolve() if (args.pages / "day.html").is_file() else None
+    output = args.output.resolve() if args.output else None
+    baseline = args.compare.resolve() if args.compare else None
+    commit = git_commit()
+    os.environ.setdefault("PREFETCH_ENABLED", "0")
+    # api.main tworzy swoje bazy w katalogu bieżącym
+    os.chdir(tempfile.mkdtemp(prefix="geo-app-bench-"))
+
+    with StubServer(boxes=args.boxes, latency=args.latency, pages_dir=pages_dir) as stub:
+        new_pipeline = lambda: Pipeline(stub.base_url, args.workers, args.geocode_latency)
+        fixtures = load_fixtures(new_pipeline)
+
+        result = {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "html_parser": Waw4FreeParser(geocode=False).html_parser,
+            "pages": "recorded" if pages_dir else "synthetic",
+            "params": {k: v for k, v in vars(args).items() if k in
+                       ("boxes", "latency", "geocode_latency", "workers", "repeat")},
+            "stages": {},
+        }
+        print(f"{'etap':<12} {'elementy':>9} {'zimny [ms]':>11} {'ciepły [ms]':>12}")
+        for name, (setup, measure) in stage_functions(fixtures).items():
+            stage = run_stage(new_pipeline, setup, measure, args.repeat)
+            result["stages"][name] = stage
+            print(f"{name:<12} {stage['items']:>9} {stage['cold']['median_ms']:>11.2f} "
+                  f"{stage['warm']['median_ms']:>12.2f}")
+
+    if output:
+        output.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    if baseline and compare(result, baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: ponowne pobranie dnia - pełne przetwarzanie vs przyrostowe (skróty stron i boxów)
+
+Pierwsze pobranie wypełnia magazyn wydarzeń, potem dzień jest pobierany
+ponownie bez zmian i po zmianie kilku boxów. Pełne przetwarzanie to parser
+bez zapamiętanego stanu dnia (jak przed wprowadzeniem skrótów) - też
+korzysta z magazynu, więc nie pobiera ponownie stron wydarzeń.
+
+Uruchomienie (z katalogu głównego):
+    python -m benchmarks.bench_rescrape [--boxes 200] [--changed 5]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stub_server import StubGeocoder, StubServer
+from logic.event_store import EventStore
+from logic.parser_update import Waw4FreeParser
+
+DAY = (29, 1, 2026)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--boxes", type=int, default=200)
+    ap.add_argument("--changed", type=int, default=5, help="liczba zmienionych boxów")
+    ap.add_argument("--latency", type=float, default=0.005, help="opóźnienie serwera (s)")
+    ap.add_argument("--workers", type=int, default=8)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            StubServer(boxes=args.boxes, latency=args.latency) as server:
+        store = EventStore(str(Path(tmp) / "events.db"))
+
+        def new_parser() -> Waw4FreeParser:
+            return Waw4FreeParser(base_url=server.base_url, max_workers=args.workers,
+                                  event_store=store, geocoder=StubGeocoder(0))
+
+        incremental = new_parser()
+
+        def run(name: str, scrape):
+            requests_before = server.requests
+            start = time.perf_counter()
+            events, diff = scrape()
+            elapsed = time.perf_counter() - start
+            changes = "-" if diff is None else \
+                f"+{len(diff.added)} -{len(diff.removed)} ~{len(diff.changed)}"
+            print(f"{name:<30} {len(events):>7} {server.requests - requests_before:>9} "
+                  f"{elapsed * 1000:>10.1f} {changes:>12}")
+
+        print(f"{'pobranie':<30} {'events':>7} {'zapytania':>9} {'czas [ms]':>10} {'zmiany':>12}")
+        run("pierwsze", lambda: incremental.get_events_and_diff(*DAY))
+        run("bez zmian: pełne", lambda: (new_parser().get_events_from_date(*DAY), None))
+        run("bez zmian: przyrostowe", lambda: incremental.get_events_and_diff(*DAY))
+
+        server.edits = {i: 1 for i in range(args.changed)}
+        run(f"{args.changed} zmienionych: pełne", lambda: (new_parser().get_events_from_date(*DAY), None))
+        run(f"{args.changed} zmienionych: przyrostowe", lambda: incremental.get_events_and_diff(*DAY))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Zapis strony dnia i stron jej wydarzeń z waw4free.pl do katalogu fikstur
+
+Zapisane strony serwuje StubServer(pages_dir=...) - benchmarki działają
+wtedy na prawdziwym HTML bez odpytywania serwisu.
+
+Uruchomienie (z katalogu głównego):
+    python -m benchmarks.record_pages 2026-01-29 [katalog]
+"""
+
+import argparse
+import time
+from datetime import date
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+from benchmarks.stub_server import fixture_name
+from logic.parser_update import BASE_URL, BOX_STRAINER
+
+PAGES_DIR = Path(__file__).parent / "fixtures" / "pages"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("date", type=date.fromisoformat, help="dzień w formacie RRRR-MM-DD")
+    ap.add_argument("directory", nargs="?", type=Path, default=PAGES_DIR)
+    ap.add_argument("--delay", type=float, default=0.5, help="odstęp między zapytaniami (s)")
+    args = ap.parse_args()
+
+    session = requests.Session()
+    session.headers["User-Agent"] = "Mozilla/5.0 (compatible; Waw4FreeParser/1.0)"
+    args.directory.mkdir(parents=True, exist_ok=True)
+
+    d = args.date
+    response = session.get(f"{BASE_URL}warszawa-wydarzenia-{d.year}-{d.month}-{d.day}", timeout=30)
+    response.raise_for_status()
+    # Linki względne - atrapa serwuje strony wydarzeń spod własnego adresu
+    (args.directory / "day.html").write_text(response.text.replace(BASE_URL, ""), encoding="utf-8")
+
+    soup = BeautifulSoup(response.text, "html.parser", parse_only=BOX_STRAINER)
+    paths = []
+    for a_tag in soup.find_all("a", href=True):
+        path = urlparse(urljoin(BASE_URL, a_tag["href"])).path.lstrip("/")
+        if path and path not in paths:
+            paths.append(path)
+
+    for i, path in enumerate(paths, 1):
+        time.sleep(args.delay)
+        page = session.get(urljoin(BASE_URL, path), timeout=30)
+        if page.ok:
+            (args.directory / fixture_name(path)).write_text(page.text, encoding="utf-8")
+        print(f"[{i}/{len(paths)}] {page.status_code} {path}")
+
+
+if __name__ == "__main__":
+    main()
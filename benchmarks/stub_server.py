@@ -0,0 +1,177 @@
+"""
+Atrapy usług zewnętrznych do benchmarków:
+lokalny serwer waw4free.pl (strony dnia i wydarzeń) oraz geokoder z opóźnieniem
+
+Serwer generuje strony albo serwuje zapisane (benchmarks/record_pages.py):
+day.html dla każdej strony dnia i <ścieżka>.html dla stron wydarzeń.
+"""
+
+import hashlib
+import random
+import threading
+import time
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+DISTRICTS = ["Mokotów", "Wola", "Śródmieście", "Ochota", "Praga-Północ", "Żoliborz"]
+STREETS = ["Marszałkowska", "Puławska", "Nowy Świat", "Grójecka", "Targowa", "Mickiewicza"]
+CATEGORIES = ["koncert", "wystawa", "dla dzieci", "spotkanie", "warsztaty", "film"]
+
+
+def render_box(idx: int, revision: int = 0) -> str:
+    """HTML pojedynczego boxa wydarzenia (revision > 0 - zmieniony tytuł)"""
+    rnd = random.Random(idx)
+    district = rnd.choice(DISTRICTS)
+    categories = ", ".join(rnd.sample(CATEGORIES, 2))
+    title = f"Wydarzenie testowe {idx}" + (f" (zmiana {revision})" if revision else "")
+    return f"""
+<div class="box">
+  <a href="wydarzenie-{idx}-test" title="{title}"></a>
+  <div class="box-image" style="background-image: url('img/{idx}.jpg');"></div>
+  <div class="box-data">29.01.2026, 18:00, {district}</div>
+  <div class="box-category">{categories}</div>
+</div>"""
+
+
+def render_day(boxes: int, edits: Optional[dict] = None) -> str:
+    """HTML strony dnia z zadaną liczbą boxów (edits: numer boxa -> rewizja)"""
+    edits = edits or {}
+    body = "".join(render_box(i, edits.get(i, 0)) for i in range(boxes))
+    return f"<html><head><title>Wydarzenia</title></head><body><div id=\"content\">{body}</div></body></html>"
+
+
+def render_detail(idx: int) -> str:
+    """HTML strony wydarzenia z adresem"""
+    rnd = random.Random(idx)
+    street = rnd.choice(STREETS)
+    district = rnd.choice(DISTRICTS)
+    return f"""<html><body>
+<h1>Wydarzenie testowe {idx}</h1>
+<p>{"Opis wydarzenia. " * 50}</p>
+<div itemprop="location">ul. {street} {idx % 50 + 1}, {district}, Warszawa</div>
+</body></html>"""
+
+
+def fixture_name(path: str) -> str:
+    """Nazwa pliku zapisanej strony dla ścieżki URL"""
+    return path.strip("/").replace("/", "_") + ".html"
+
+
+class _Server(ThreadingHTTPServer):
+    # Domyślna kolejka (5) przy kilkunastu równoległych połączeniach gubi SYN-y - sekunda retransmisji
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class StubServer:
+    """Serwer HTTP w tle z konfigurowalnym opóźnieniem odpowiedzi"""
+
+    def __init__(self, boxes: int = 60, latency: float = 0.05, pages_dir: Optional[Path] = None):
+        self.boxes = boxes
+        self.latency = latency
+        self.pages_dir = Path(pages_dir) if pages_dir else None
+        # Zmiany stron dni w trakcie działania: numer boxa -> rewizja
+        self.edits = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = _Server(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}/"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                time.sleep(server.latency)
+
+                path = self.path.lstrip("/")
+                if server.pages_dir is not None:
+                    body = server.recorded_page(path)
+                    if body is None:
+                        self.send_error(404)
+                        return
+                elif path.startswith("warszawa-wydarzenia-"):
+                    body = render_day(server.boxes, server.edits)
+                elif path.startswith("wydarzenie-"):
+                    body = render_detail(int(path.split("-")[1]))
+                else:
+                    self.send_error(404)
+                    return
+
+                data = body.encode("utf-8")
+                etag = '"' + hashlib.md5(data).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def recorded_page(self, path: str) -> Optional[str]:
+        """Zapisana strona (każda strona dnia to day.html)"""
+        name = "day.html" if path.startswith("warszawa-wydarzenia-") else fixture_name(path)
+        file = self.pages_dir / name
+        return file.read_text(encoding="utf-8") if file.is_file() else None
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class StubGeocoder:
+    """Geokoder-atrapa (interfejs GeocodingService.geocode) liczący wywołania"""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def geocode(self, address):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return (52.23, 21.01)
+
+
+Location = namedtuple("Location", ["latitude", "longitude"])
+
+
+class StubArcGIS:
+    """Atrapa klienta geopy ArcGIS - podstawiana jako GeocodingService.geocoder"""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def geocode(self, query, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        # Stałe współrzędne dla adresu, w granicach Warszawy
+        rnd = random.Random(query)
+        return Location(52.15 + rnd.random() * 0.2, 20.9 + rnd.random() * 0.25)
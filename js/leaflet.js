@@ -219,24 +219,27 @@ function setupCategoryFilter() {
 
         if (!eventsLayer) return;
 
-        eventsLayer.eachLayer((layer) => {
-            const categories = layer.feature?.properties?.category || [];
-            const primary = normalizeCategoryName(getPrimaryCategory(categories));
-            const isVisible = activeCategories.has(primary);
-
-            if (typeof layer.setOpacity === 'function') {
-                layer.setOpacity(isVisible ? 1 : 0);
-            }
-            if (typeof layer.setInteractive === 'function') {
-                layer.setInteractive(isVisible);
-            }
-            if (!isVisible) {
-                layer.closePopup?.();
-            }
-        });
+        eventsLayer.eachLayer(applyCategoryVisibility);
     });
 }
 
+// Widoczność markera według aktywnych kategorii
+function applyCategoryVisibility(layer) {
+    const categories = layer.feature?.properties?.category || [];
+    const primary = normalizeCategoryName(getPrimaryCategory(categories));
+    const isVisible = activeCategories.has(primary);
+
+    if (typeof layer.setOpacity === 'function') {
+        layer.setOpacity(isVisible ? 1 : 0);
+    }
+    if (typeof layer.setInteractive === 'function') {
+        layer.setInteractive(isVisible);
+    }
+    if (!isVisible) {
+        layer.closePopup?.();
+    }
+}
+
 // Pobieranie koloru kategorii
 function getCategoryColor(categories) {
     const primaryCat = getPrimaryCategory(categories);
@@ -259,7 +262,7 @@ function updateLegend() {
         item.className = 'legend-item';
         item.innerHTML = `
             <div class="legend-color" style="background-color: ${color}"></div>
-            <input type="checkbox" class="category-toggle" data-category="${normalized}" checked>
+            <input type="checkbox" class="category-toggle" data-category="${normalized}" ${activeCategories.has(normalized) ? 'checked' : ''}>
             <span class="legend-label">${category}</span>
         `;
         legendContent.appendChild(item);
@@ -326,54 +329,111 @@ function showStatus(message, type, autoHide = 0) {
 // ŁADOWANIE WYDARZEŃ
 // ============================================
 
-// ...existing code...
-
-function buildEventsLayer(geojsonData) {
-    const nextUsedCategories = new Set();
+// Wydarzenia kafelków: link -> { marker, refs } (wydarzenie może leżeć w kilku
+// kafelkach na chwilę przy zmianie powiększenia - marker jest jeden)
+let eventMarkers = new Map();
+let eventTiles;
+
+function createEventMarker(feature) {
+    const [lon, lat] = feature.geometry.coordinates;
+    const color = getCategoryColor(feature.properties.category);
+    const marker = L.marker([lat, lon], { icon: createColoredIcon(color) });
+    marker.feature = feature;
+    marker.bindPopup(createPopupContent(feature.properties), {
+        maxWidth: 320,
+        className: 'custom-popup'
+    });
+    return marker;
+}
 
-    const nextLayer = L.geoJSON(geojsonData, {
-        pointToLayer: function(feature, latlng) {
-            const primaryCategory = getPrimaryCategory(feature.properties.category);
-            nextUsedCategories.add(primaryCategory);
+// Dodaje wydarzenia kafelka, zwraca ich linki (do usunięcia przy zwolnieniu kafelka)
+function addTileFeatures(features) {
+    const newMarkers = [];
+    const links = features.map((feature) => {
+        const link = feature.properties.link;
+        const entry = eventMarkers.get(link);
+        if (entry) {
+            entry.refs += 1;
+            return link;
+        }
 
-            const color = getCategoryColor(feature.properties.category);
-            return L.marker(latlng, { icon: createColoredIcon(color) });
-        },
-        onEachFeature: function(feature, layer) {
-            const popupContent = createPopupContent(feature.properties);
-            layer.bindPopup(popupContent, {
-                maxWidth: 320,
-                className: 'custom-popup'
-            });
+        const primaryCategory = getPrimaryCategory(feature.properties.category);
+        if (!usedCategories.has(primaryCategory)) {
+            usedCategories.add(primaryCategory);
+            activeCategories.add(normalizeCategoryName(primaryCategory));
         }
+
+        const marker = createEventMarker(feature);
+        applyCategoryVisibility(marker);
+        eventMarkers.set(link, { marker, refs: 1 });
+        newMarkers.push(marker);
+        return link;
     });
 
-    if (eventsLayer) {
-        map.removeLayer(eventsLayer);
+    if (newMarkers.length > 0) {
+        eventsLayer.addLayers(newMarkers);
+        updateLegend();
     }
-    // wtyczka
-    const clusterGroup = L.markerClusterGroup();
-    clusterGroup.addLayer(nextLayer)
-    eventsLayer = clusterGroup.addTo(map);
-
-    usedCategories = nextUsedCategories;
+    return links;
+}
 
-    // ✅ aktywne = znormalizowane
-    activeCategories = new Set(Array.from(usedCategories).map(normalizeCategoryName));
+function removeTileFeatures(links) {
+    const removed = [];
+    links.forEach((link) => {
+        const entry = eventMarkers.get(link);
+        if (!entry) return;
+        entry.refs -= 1;
+        if (entry.refs === 0) {
+            eventMarkers.delete(link);
+            removed.push(entry.marker);
+        }
+    });
+    if (removed.length > 0) {
+        eventsLayer.removeLayers(removed);
+    }
+}
 
-    updateLegend();
+// Warstwa pobierająca /api/tiles/{z}/{x}/{y} dla widocznych kafelków;
+// przeglądarka trzyma kafelki w cache'u i odświeża je ETagiem
+const EventTilesLayer = L.GridLayer.extend({
+    initialize: function(dateQuery, options) {
+        L.GridLayer.prototype.initialize.call(this, options);
+        this._dateQuery = dateQuery;
+        this._tileLinks = {};
+
+        this.on('tileunload', (e) => {
+            const key = this._tileCoordsToKey(e.coords);
+            removeTileFeatures(this._tileLinks[key] || []);
+            delete this._tileLinks[key];
+        });
+    },
 
-    const eventCount = geojsonData.features.length;
-    if (eventCount > 0) {
-        map.fitBounds(eventsLayer.getBounds(), { padding: [50, 50] });
-        showStatus(`✅ Załadowano ${eventCount} wydarzeń`, 'success', 3000);
-    } else {
-        showStatus('⚠️ Brak wydarzeń w tym dniu', 'warning', 3000);
+    createTile: function(coords, done) {
+        const tile = document.createElement('div');
+        const key = this._tileCoordsToKey(coords);
+
+        fetch(`${API_URL}/api/tiles/${coords.z}/${coords.x}/${coords.y}?${this._dateQuery}`)
+            .then((response) => {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then((geojsonData) => {
+                // Kafelek mógł zostać zwolniony (albo utworzony ponownie) w trakcie pobierania
+                if (this._tiles[key] && this._tiles[key].el === tile) {
+                    this._tileLinks[key] = addTileFeatures(geojsonData.features);
+                }
+                done(null, tile);
+            })
+            .catch((error) => done(error, tile));
+
+        return tile;
     }
-}
+});
 
 
-async function loadEvents() {
+function loadEvents() {
     const selectedDate = datePicker.selectedDates[0];
 
     if (!selectedDate) {
@@ -387,25 +447,37 @@ async function loadEvents() {
 
     showStatus('<span class="spinner"></span> Ładowanie wydarzeń...', 'loading');
 
-    try {
-        const response = await fetch(
-            `${API_URL}/api/events/geojson?day=${day}&month=${month}&year=${year}`
-        );
-
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
+    // Zwolnienie kafelków poprzedniej daty usuwa też ich markery
+    if (eventTiles) {
+        map.removeLayer(eventTiles);
+    }
+    if (eventsLayer) {
+        map.removeLayer(eventsLayer);
+    }
+    eventMarkers = new Map();
+    usedCategories = new Set();
+    activeCategories = new Set();
+    updateLegend();
 
-        const geojsonData = await response.json();
+    // wtyczka
+    eventsLayer = L.markerClusterGroup().addTo(map);
 
-        localStorage.setItem('eventsDate', `${year}-${month}-${day}`);
-        localStorage.setItem('eventsGeojson', JSON.stringify(geojsonData));
+    eventTiles = new EventTilesLayer(`day=${day}&month=${month}&year=${year}`);
+    eventTiles.on('tileerror', (e) => {
+        console.error('Błąd:', e.error);
+        showStatus(`❌ Błąd: ${e.error?.message || 'nie udało się pobrać wydarzeń'}`, 'error', 5000);
+    });
+    eventTiles.on('load', () => {
+        const eventCount = eventMarkers.size;
+        if (eventCount > 0) {
+            showStatus(`✅ Załadowano ${eventCount} wydarzeń`, 'success', 3000);
+        } else {
+            showStatus('⚠️ Brak wydarzeń w widoku mapy', 'warning', 3000);
+        }
+    });
+    eventTiles.addTo(map);
 
-        buildEventsLayer(geojsonData);
-    } catch (error) {
-        console.error('Błąd:', error);
-        showStatus(`❌ Błąd: ${error.message}`, 'error', 5000);
-    }
+    localStorage.setItem('eventsDate', `${year}-${month}-${day}`);
 }
 
 
@@ -449,12 +521,8 @@ updateLegend();
 setupCategoryFilter();
 
 window.addEventListener('load', () => {
-    const saved = localStorage.getItem('eventsGeojson');
-    if (saved) {
-        const geojsonData = JSON.parse(saved);
-        buildEventsLayer(geojsonData);
-        return;
-    }
+    // Kafelki trzyma cache przeglądarki - cała FeatureCollection nie jest już zapisywana
+    localStorage.removeItem('eventsGeojson');
     setTimeout(loadEvents, 500);
 });
 
@@ -472,15 +540,7 @@ function toggleAllCategories(checked) {
 
     if (!eventsLayer) return;
 
-    eventsLayer.eachLayer((layer) => {
-        const categories = layer.feature?.properties?.category || [];
-        const primary = normalizeCategoryName(getPrimaryCategory(categories));
-        const isVisible = activeCategories.has(primary);
-
-        layer.setOpacity?.(isVisible ? 1 : 0);
-        layer.setInteractive?.(isVisible);
-        if (!isVisible) layer.closePopup?.();
-    });
+    eventsLayer.eachLayer(applyCategoryVisibility);
 }
 
 document.getElementById('category-toggle')?.addEventListener('change', (e) => {
@@ -0,0 +1,83 @@
+"""
+Normalizacja adresów - wspólny klucz cache'u dla parsera i geokodowania
+"""
+
+import re
+import unicodedata
+
+DISTRICTS = [
+    "Mokotów", "Praga-Południe", "Białołęka", "Wola", "Ursynów",
+    "Bielany", "Śródmieście", "Wawer", "Ochota", "Ursus",
+    "Praga-Północ", "Wesoła", "Żoliborz", "Wilanów", "Włochy", "Rembertów"
+]
+# Dzielnice spoza DISTRICTS (parser ich nie rozpoznaje), usuwane tylko z kluczy
+OTHER_DISTRICTS = ["Bemowo", "Targówek"]
+NO_ADDRESS = "Brak adresu"
+ADDRESS_FETCH_ERROR = "Brak adresu (błąd pobierania)"
+NON_GEOCODABLE = (NO_ADDRESS, ADDRESS_FETCH_ERROR)
+
+# Warianty przedrostków -> forma kanoniczna ("" = pomijany)
+STREET_PREFIXES = {
+    "ul": "", "ulica": "",
+    "al": "al", "aleja": "al", "aleje": "al", "alei": "al",
+    "pl": "pl", "plac": "pl", "placu": "pl",
+    "os": "os", "osiedle": "os",
+    "rondo": "rondo", "skwer": "skwer", "bulwar": "bulwar",
+}
+
+# Litery bez rozkładu NFKD
+_EXTRA_FOLD = str.maketrans({"ł": "l", "Ł": "L", "ø": "o", "đ": "d"})
+
+
+def fold(text: str) -> str:
+    """Małe litery bez polskich znaków diakrytycznych ("Łódź" -> "lodz")"""
+    text = unicodedata.normalize("NFKD", text.translate(_EXTRA_FOLD))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.casefold()
+
+
+_NOISE = re.compile(
+    r"\b(?:warszawa|polska|" + "|".join(re.escape(fold(d)) for d in DISTRICTS + OTHER_DISTRICTS) + r")\b"
+    r"|\b\d{2}-\d{3}\b"
+)
+_PUNCTUATION = re.compile(r"[,;.:()\"']")
+_SPACES = re.compile(r"\s+")
+
+
+def clean_address(address: str) -> str:
+    """
+    Adres do wyświetlenia: bez miasta, dzielnicy i przecinków
+
+    Args:
+        address: Tekst adresu ze strony wydarzenia
+
+    Returns:
+        Oczyszczony adres (może być pusty)
+    """
+    address = address.replace("Warszawa", "")
+    for district in DISTRICTS:
+        address = address.replace(district, "")
+    address = address.replace(",", "")
+    return _SPACES.sub(" ", address).strip()
+
+
+def canonical_key(address: str) -> str:
+    """
+    Klucz cache'u adresu: warianty zapisu tego samego adresu dają ten sam klucz
+    ("ul. Marszałkowska 10", "Marszałkowska 10", "MARSZAŁKOWSKA  10 " -> "marszalkowska 10")
+
+    Args:
+        address: Adres w dowolnej postaci
+
+    Returns:
+        Klucz kanoniczny
+    """
+    text = fold(unicodedata.normalize("NFKC", address))
+    text = _NOISE.sub(" ", text)
+    words = _SPACES.sub(" ", _PUNCTUATION.sub(" ", text)).split()
+
+    if words and words[0] in STREET_PREFIXES:
+        prefix = STREET_PREFIXES[words[0]]
+        words = ([prefix] if prefix else []) + words[1:]
+
+    return " ".join(words)
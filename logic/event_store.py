@@ -0,0 +1,149 @@
+"""
+Trwały magazyn sparsowanych wydarzeń (klucz: permalink wydarzenia)
+"""
+
+import json
+import time
+from typing import Dict, Iterable, Iterator, Optional
+import logging
+from logic.sqlite_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (
+    "plink", "title", "image", "district", "address", "box_category",
+    "start_date", "end_date", "date", "time", "latitude", "longitude", "last_seen"
+)
+
+
+class EventStore:
+    """Zarządzanie magazynem wydarzeń w SQLite"""
+
+    def __init__(self, db_path: str = "events_store.db", pool_size: int = 16):
+        """
+        Args:
+            db_path: ścieżka bazy
+            pool_size: liczba połączeń w puli (czytają wątki parsera, po jednym na box)
+        """
+        self.db_path = db_path
+        self._pool = ConnectionPool(db_path, pool_size)
+        self._init_db()
+
+    def close(self):
+        """Zamknij wszystkie połączenia z puli"""
+        self._pool.close()
+
+    def _init_db(self):
+        """Inicjalizacja bazy danych"""
+        with self._pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    plink TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    image TEXT,
+                    district TEXT,
+                    address TEXT,
+                    box_category TEXT,
+                    start_date TEXT,
+                    end_date TEXT,
+                    date TEXT,
+                    time TEXT,
+                    latitude REAL,
+                    longitude REAL,
+                    last_seen REAL NOT NULL
+                )
+            """)
+            logger.info(f"Magazyn wydarzeń zainicjowany: {self.db_path}")
+
+    def get(self, plink: str) -> Optional[Dict]:
+        """
+        Pobierz zapisane wydarzenie
+
+        Args:
+            plink: Permalink wydarzenia
+
+        Returns:
+            Słownik z polami wydarzenia (position jako tuple lub None) lub None
+        """
+        try:
+            with self._pool.connection() as conn:
+                row = conn.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM events WHERE plink = ?",
+                    (plink,)
+                ).fetchone()
+                if row:
+                    return self._row_to_dict(row)
+        except Exception as e:
+            logger.error(f"Błąd odczytu magazynu wydarzeń: {e}")
+        return None
+
+    def iter_events(self) -> Iterator[Dict]:
+        """Wszystkie zapisane wydarzenia (słowniki jak z get)"""
+        try:
+            with self._pool.connection() as conn:
+                for row in conn.execute(f"SELECT {', '.join(COLUMNS)} FROM events"):
+                    yield self._row_to_dict(row)
+        except Exception as e:
+            logger.error(f"Błąd odczytu magazynu wydarzeń: {e}")
+
+    def save_many(self, events: Iterable) -> int:
+        """
+        Zapisz (lub odśwież) wydarzenia w jednej transakcji
+
+        Args:
+            events: Obiekty EventBox
+
+        Returns:
+            Liczba zapisanych wydarzeń
+        """
+        now = time.time()
+        rows = []
+        for event in events:
+            lat, lon = event.position if event.position else (None, None)
+            rows.append((
+                event.plink, event.title, event.image, event.district, event.address,
+                json.dumps(event.box_category or [], ensure_ascii=False),
+                event.start_date, event.end_date, event.date, event.time, lat, lon, now
+            ))
+        if not rows:
+            return 0
+
+        try:
+            with self._pool.connection() as conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO events ({', '.join(COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                    rows
+                )
+                return len(rows)
+        except Exception as e:
+            logger.error(f"Błąd zapisu magazynu wydarzeń: {e}")
+            return 0
+
+    def clear_positions(self) -> bool:
+        """Usuń zapisane współrzędne (adresy zostają; wydarzenia zostaną geokodowane od nowa)"""
+        try:
+            with self._pool.connection() as conn:
+                conn.execute("UPDATE events SET latitude = NULL, longitude = NULL")
+                return True
+        except Exception as e:
+            logger.error(f"Błąd czyszczenia współrzędnych: {e}")
+            return False
+
+    def get_stats(self) -> dict:
+        """Pobierz statystyki magazynu"""
+        try:
+            with self._pool.connection() as conn:
+                count = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+                return {"stored_events": count}
+        except Exception as e:
+            logger.error(f"Błąd statystyk: {e}")
+            return {"stored_events": 0}
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict:
+        data = dict(zip(COLUMNS, row))
+        data["box_category"] = json.loads(data["box_category"] or "[]")
+        lat, lon = data.pop("latitude"), data.pop("longitude")
+        data["position"] = (lat, lon) if lat is not None and lon is not None else None
+        return data
@@ -0,0 +1,85 @@
+"""
+Ograniczony cache w pamięci procesu (LRU + TTL)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class MemoryCache:
+    """Słownik LRU z czasem życia wpisów, bezpieczny dla wątków"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """
+        Args:
+            maxsize: maksymalna liczba wpisów (najdawniej używane są usuwane)
+            ttl: czas życia wpisu w sekundach (None = bez limitu)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Pobierz wartość (odświeża pozycję LRU)"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires_at = item
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Pobierz wartość bez liczenia trafień i bez odświeżania pozycji LRU"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and (item[1] is None or item[1] > time.monotonic()):
+                return item[0]
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Zapisz wartość; ttl nadpisuje domyślny czas życia"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and (item[1] is None or item[1] > time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> dict:
+        """Liczniki trafień"""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
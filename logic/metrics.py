@@ -0,0 +1,165 @@
+"""
+Metryki w formacie tekstowym Prometheusa (bez zewnętrznych zależności)
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Czasy (s) i rozmiary odpowiedzi (bajty)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# (nazwa, typ, opis, [(przyrostek nazwy próbki, etykiety, wartość)])
+Family = Tuple[str, str, str, List[Tuple[str, Dict[str, str], float]]]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Licznik rosnący, z etykietami"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> Family:
+        with self._lock:
+            samples = [("", dict(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+        return self.name, "counter", self.documentation, samples
+
+
+class Histogram:
+    """Histogram z kubełkami skumulowanymi (jak prometheus_client)"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # etykiety -> [liczniki kubełków..., powyżej ostatniego, suma]
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Mierzy czas bloku with (także zakończonego wyjątkiem)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self) -> Family:
+        samples = []
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        for key, state in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                samples.append(("_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append(("_sum", labels, state[-1]))
+            samples.append(("_count", labels, cumulative))
+        return self.name, "histogram", self.documentation, samples
+
+
+class Registry:
+    """Zbiór metryk i funkcji zbierających, renderowany do formatu tekstowego"""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register(self, collector: Callable[[], Iterable[Family]]):
+        """Funkcja zwracająca rodziny metryk liczonych gdzie indziej (np. get_stats)"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        families = [metric.collect() for metric in self._metrics]
+        for collector in self._collectors:
+            families.extend(collector())
+
+        lines = []
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Scraping waw4free.pl
+PAGE_FETCH_SECONDS = REGISTRY.histogram(
+    "waw4free_fetch_seconds", "Czas zapytania HTTP do waw4free.pl", ["page", "status"])
+PAGE_PARSE_SECONDS = REGISTRY.histogram(
+    "waw4free_parse_seconds", "Czas parsowania HTML", ["page"])
+DAY_PAGES = REGISTRY.counter(
+    "waw4free_day_pages_total", "Pobrane strony dni (unchanged - bez ponownego parsowania)", ["result"])
+EVENT_CHANGES = REGISTRY.counter(
+    "waw4free_event_changes_total", "Zmiany wydarzeń między kolejnymi pobraniami dnia", ["change"])
+
+# Geokodowanie
+GEOCODE_CACHE_SECONDS = REGISTRY.histogram(
+    "geocode_cache_seconds", "Czas odczytu współrzędnych z cache'u", ["tier"])
+GEOCODE_UPSTREAM_SECONDS = REGISTRY.histogram(
+    "geocode_arcgis_seconds", "Czas zapytania do ArcGIS", ["result"])
+
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "upstream_errors_total", "Błędy usług zewnętrznych", ["service", "kind"])
+
+# API
+REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "Czas obsługi zapytania (do wysłania całej odpowiedzi)",
+    ["endpoint", "method", "status"])
+RESPONSE_BYTES = REGISTRY.histogram(
+    "http_response_size_bytes", "Rozmiar wysłanej odpowiedzi", ["endpoint"], buckets=SIZE_BUCKETS)
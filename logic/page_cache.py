@@ -0,0 +1,169 @@
+"""
+Dyskowy cache stron HTTP (strony dnia i strony wydarzeń)
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+import logging
+from logic.sqlite_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Domyślne czasy życia wpisów (s)
+DAY_PAGE_TTL = 60 * 60            # lista wydarzeń dnia zmienia się w ciągu dnia
+DETAIL_PAGE_TTL = 7 * 24 * 60 * 60  # strony wydarzeń praktycznie się nie zmieniają
+# Wpisy starsze niż RETENTION_FACTOR * detail_ttl są usuwane (minione dni, wygasłe wydarzenia)
+RETENTION_FACTOR = 4
+
+
+@dataclass
+class CachedPage:
+    """Wpis cache'u strony"""
+    url: str
+    body: str
+    size: int
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.fetched_at < ttl
+
+
+class PageCache:
+    """Cache stron w SQLite z licznikami trafień"""
+
+    def __init__(self, db_path: str = "pages_cache.db",
+                 day_ttl: float = DAY_PAGE_TTL, detail_ttl: float = DETAIL_PAGE_TTL,
+                 retention: Optional[float] = None, pool_size: int = 16):
+        """
+        Args:
+            db_path: ścieżka bazy
+            day_ttl: czas życia strony dnia (s)
+            detail_ttl: czas życia strony wydarzenia (s)
+            retention: wiek (s), po którym wpis jest usuwany
+                (domyślnie RETENTION_FACTOR * detail_ttl)
+            pool_size: liczba połączeń w puli (zapisują wątki parsera)
+        """
+        self.db_path = db_path
+        self.day_ttl = day_ttl
+        self.detail_ttl = detail_ttl
+        self.retention = retention if retention is not None else RETENTION_FACTOR * detail_ttl
+        self._pool = ConnectionPool(db_path, pool_size)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.bytes_saved = 0
+        self.purged = 0
+        self._last_purge = 0.0
+        self._init_db()
+        self.purge()
+
+    def _init_db(self):
+        """Inicjalizacja bazy danych"""
+        with self._pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    body TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_fetched_at ON pages (fetched_at)")
+            logger.info(f"Cache stron zainicjowany: {self.db_path}")
+
+    def close(self):
+        """Zamknij połączenia z puli"""
+        self._pool.close()
+
+    def purge(self) -> int:
+        """Usuń wpisy starsze niż retention; zwraca liczbę usuniętych"""
+        with self._lock:
+            self._last_purge = time.monotonic()
+        try:
+            with self._pool.connection() as conn:
+                deleted = conn.execute(
+                    "DELETE FROM pages WHERE fetched_at < ?", (time.time() - self.retention,)
+                ).rowcount
+        except Exception as e:
+            logger.error(f"Błąd czyszczenia cache'u stron: {e}")
+            return 0
+        if deleted:
+            logger.info(f"Usunięto {deleted} przeterminowanych stron z cache'u")
+        with self._lock:
+            self.purged += deleted
+        return deleted
+
+    def _purge_if_due(self) -> None:
+        """Czyszczenie najwyżej raz na day_ttl (przy zapisie)"""
+        with self._lock:
+            due = time.monotonic() - self._last_purge >= self.day_ttl
+        if due:
+            self.purge()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Pobierz wpis (również przeterminowany - do zapytań warunkowych)"""
+        try:
+            with self._pool.connection() as conn:
+                row = conn.execute(
+                    "SELECT url, body, size, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                    (url,)
+                ).fetchone()
+                if row:
+                    return CachedPage(*row)
+        except Exception as e:
+            logger.error(f"Błąd odczytu cache'u stron: {e}")
+        return None
+
+    def save(self, url: str, body: str, size: int,
+             etag: Optional[str] = None, last_modified: Optional[str] = None) -> bool:
+        """Zapisz stronę w cache'u"""
+        try:
+            with self._pool.connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO pages (url, body, size, etag, last_modified, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, body, size, etag, last_modified, time.time())
+                )
+        except Exception as e:
+            logger.error(f"Błąd zapisu cache'u stron: {e}")
+            return False
+        self._purge_if_due()
+        return True
+
+    def touch(self, url: str) -> None:
+        """Odśwież znacznik czasu po odpowiedzi 304"""
+        try:
+            with self._pool.connection() as conn:
+                conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+        except Exception as e:
+            logger.error(f"Błąd zapisu cache'u stron: {e}")
+
+    def record_hit(self, page: CachedPage, revalidated: bool = False) -> None:
+        with self._lock:
+            if revalidated:
+                self.revalidated += 1
+            else:
+                self.hits += 1
+            self.bytes_saved += page.size
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def get_stats(self) -> dict:
+        """Liczniki cache'u stron"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "bytes_saved": self.bytes_saved,
+                "purged": self.purged,
+            }
@@ -3,17 +3,37 @@ Parser wydarzeń z waw4free.pl
 Pobiera i parsuje wydarzenia z Warszawy
 """
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import requests
-from dataclasses import dataclass, asdict
-from typing import List, Optional, Union
-from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import copy
+import functools
+import hashlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Container, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from datetime import datetime, date
 import logging
 from urllib.parse import urljoin
 import json
-from geopy import geocoders, Location
-from geopy.geocoders import ArcGIS
+import gzip
+import time
+from pathlib import Path
+
+if __package__ in (None, ''):
+    # Uruchomienie jako skrypt (python logic/parser_update.py) - katalog główny na ścieżce importu
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from logic.address import DISTRICTS, NO_ADDRESS, ADDRESS_FETCH_ERROR, NON_GEOCODABLE, clean_address
+from logic.page_cache import PageCache
+from logic.event_store import EventStore
+from logic.singleflight import SingleFlight
+from logic.memory_cache import MemoryCache
+from logic.metrics import DAY_PAGES, EVENT_CHANGES, PAGE_FETCH_SECONDS, PAGE_PARSE_SECONDS, UPSTREAM_ERRORS
+
+if TYPE_CHECKING:
+    from api.geocoding_service import GeocodingService
 
 # Konfiguracja loggera
 logging.basicConfig(level=logging.INFO)
@@ -21,112 +41,364 @@ logger = logging.getLogger(__name__)
 
 # Stałe
 BASE_URL = "https://waw4free.pl/"
-DISTRICTS = [
-    "Mokotów", "Praga-Południe", "Białołęka", "Wola", "Ursynów", 
-    "Bielany", "Śródmieście", "Wawer", "Ochota", "Ursus", 
-    "Praga-Północ", "Wesoła", "Żoliborz", "Wilanów", "Włochy", "Rembertów"
-]
 
-@dataclass
+NO_EVENTS_TEXT = "W tym dniu nie ma jeszcze żadnych wydarzeń."
+NOT_FOUND_TEXT = "Strona, której szukasz nie istnieje."
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_HTML_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_HTML_PARSER = 'html.parser'
+
+
+def _has_class(name: str):
+    """Dopasowanie klasy CSS dla SoupStrainer (w trakcie parsowania atrybut class to jeszcze surowy tekst)"""
+    def match(value) -> bool:
+        if not value:
+            return False
+        return name in (value.split() if isinstance(value, str) else value)
+    return match
+
+
+# Budowane są tylko potrzebne poddrzewa: boxy wydarzeń ze stron dnia i adres ze strony wydarzenia
+BOX_STRAINER = SoupStrainer('div', class_=_has_class('box'))
+LOCATION_STRAINER = SoupStrainer(attrs={'itemprop': 'location'})
+
+
+def _page_kind(url: str) -> str:
+    """Etykieta metryk: strona wydarzenia lub lista (dzień, strona główna)"""
+    return 'detail' if '/wydarzenie-' in url else 'listing'
+
+def _relative_url(url: str) -> str:
+    """Adres bez przedrostka BASE_URL (linki waw4free trzymane krócej)"""
+    return url[len(BASE_URL):] if url and url.startswith(BASE_URL) else url
+
+
+def _absolute_url(path: str) -> str:
+    """Odwrotność _relative_url"""
+    return BASE_URL + path if path and not path.startswith(('http://', 'https://')) else path
+
+
+# Te same zestawy kategorii (np. ('koncerty', 'dla dzieci')) współdzielone przez wszystkie wydarzenia
+_CATEGORY_SETS: dict = {}
+
+
+def _intern_categories(categories: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    if categories is None:
+        return None
+    key = tuple(sys.intern(c) for c in categories)
+    return _CATEGORY_SETS.setdefault(key, key)
+
+
 class EventBox:
-    """Reprezentacja wydarzenia"""
-    title: str
-    image: str
-    district: Optional[str]
-    address: Optional[str]
-    plink: str
-    box_category: List[str] = None
-    start_date: Optional[str] = None
-    end_date: Optional[str] = None
-    date: Optional[str] = None
-    time: Optional[str] = None
-    position: Optional[tuple[float, float]] = None # (lat, long)
+    """
+    Reprezentacja wydarzenia
+
+    Przy zakresach rzędu tysięcy wydarzeń liczy się rozmiar obiektu: __slots__
+    zamiast __dict__, dzielnice i kategorie internowane, link i obraz bez
+    przedrostka BASE_URL (atrybuty plink i image zwracają pełne adresy).
+    """
+    __slots__ = ('title', '_image', 'district', 'address', '_link', 'box_category',
+                 'start_date', 'end_date', 'date', 'time', 'position')
+
+    FIELDS = ('title', 'image', 'district', 'address', 'plink', 'box_category',
+              'start_date', 'end_date', 'date', 'time', 'position')
+    
+    def __init__(self, title: str, image: str, district: Optional[str], address: Optional[str],
+                 plink: str, box_category: Optional[Iterable[str]] = None,
+                 start_date: Optional[str] = None, end_date: Optional[str] = None,
+                 date: Optional[str] = None, time: Optional[str] = None,
+                 position: Optional[tuple[float, float]] = None): # (lat, long)
+        self.title = title
+        self.image = image
+        self.district = sys.intern(district) if district else district
+        self.address = address
+        self.plink = plink
+        self.box_category = _intern_categories(box_category)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.date = date
+        self.time = time
+        self.position = position
+    
+    @property
+    def plink(self) -> str:
+        return _absolute_url(self._link)
+    
+    @plink.setter
+    def plink(self, value: str):
+        self._link = _relative_url(value)
+    
+    @property
+    def image(self) -> str:
+        return _absolute_url(self._image)
+    
+    @image.setter
+    def image(self, value: str):
+        self._image = _relative_url(value)
+    
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.FIELDS)
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"{self.__class__.__name__}({fields})"
     
     def to_dict(self):
         """Konwersja do słownika"""
-        data = asdict(self)
-        # Konwertuj position na listę dla JSON
-        if data['position'] is not None:
-            data['position'] = {'latitude': data['position'][0], 'longitude': data['position'][1]}
-        return data
+        position = self.position
+        return {
+            'title': self.title,
+            'image': self.image,
+            'district': self.district,
+            'address': self.address,
+            'plink': self.plink,
+            'box_category': list(self.box_category) if self.box_category is not None else None,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'date': self.date,
+            'time': self.time,
+            # Konwertuj position na słownik dla JSON
+            'position': {'latitude': position[0], 'longitude': position[1]} if position is not None else None,
+        }
     
     def to_json(self):
         """Konwersja do JSON"""
         return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
 
-@dataclass
 class OtherBox:
     """Reprezentacja innego typu wydarzenia"""
-    title: str
-    image: str
-    info: str
-    plink: str
+    __slots__ = ('title', '_image', 'info', '_link')
+
+    FIELDS = ('title', 'image', 'info', 'plink')
+
+    plink = EventBox.plink
+    image = EventBox.image
+    __eq__ = EventBox.__eq__
+    __hash__ = None
+    __repr__ = EventBox.__repr__
+    
+    def __init__(self, title: str, image: str, info: str, plink: str):
+        self.title = title
+        self.image = image
+        self.info = info
+        self.plink = plink
     
     def to_dict(self):
-        return asdict(self)
+        return {'title': self.title, 'image': self.image, 'info': self.info, 'plink': self.plink}
+
+
+class PageFetchError(Exception):
+    """Strony dnia nie udało się pobrać (ani wziąć z cache'u stron)"""
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+@dataclass
+class DayDiff:
+    """Zmiany wydarzeń dnia względem poprzedniego pobrania (permalinki)"""
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    
+    @classmethod
+    def between(cls, old: Iterable, new: Iterable) -> 'DayDiff':
+        before = {event.plink: event for event in old}
+        after = {event.plink: event for event in new}
+        return cls(
+            added=[link for link in after if link not in before],
+            removed=[link for link in before if link not in after],
+            changed=[link for link, event in after.items()
+                     if link in before and before[link] is not event and before[link] != event],
+        )
+    
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+
+@dataclass
+class _DayState:
+    """Ostatnio pobrana strona dnia: skrót HTML i wydarzenia per skrót boxa"""
+    page_hash: str
+    boxes: Dict[str, Union[EventBox, OtherBox]]
+    events: List[Union[EventBox, OtherBox]]
 
 
 class Waw4FreeParser:
     """Główna klasa parsera wydarzeń"""
     
-    def __init__(self, base_url: str = BASE_URL, timeout: int = 30):
+    def __init__(self, base_url: str = BASE_URL, timeout: int = 30, max_workers: int = 8,
+                 page_cache: Optional[PageCache] = None, event_store: Optional[EventStore] = None,
+                 geocoder: Optional['GeocodingService'] = None, geocode: bool = True,
+                 pool_size: Optional[int] = None, html_parser: Optional[str] = None,
+                 tracked_days: int = 400):
+        """
+        Args:
+            base_url: adres serwisu waw4free
+            timeout: timeout zapytań HTTP (s)
+            max_workers: liczba równoległych pobrań stron wydarzeń (1 = sekwencyjnie)
+            page_cache: dyskowy cache stron (None = bez cache'u)
+            event_store: magazyn sparsowanych wydarzeń (None = zawsze pobieraj strony wydarzeń)
+            geocoder: serwis z metodą geocode(address) -> (lat, lon) | None
+                (domyślnie GeocodingService z cache'em)
+            geocode: False = nie geokoduj (position pozostaje None)
+            pool_size: liczba połączeń HTTP w puli (domyślnie max_workers; więcej,
+                gdy parser obsługuje kilka dni równocześnie)
+            html_parser: backend BeautifulSoup (domyślnie lxml, jeśli zainstalowany,
+                w przeciwnym razie html.parser)
+            tracked_days: liczba stron dni, których skróty są pamiętane
+                (niezmienione strony i boxy nie są ponownie przetwarzane)
+        """
         self.base_url = base_url
         self.timeout = timeout
+        self.page_cache = page_cache
+        self.event_store = event_store
+        # Ta sama strona wydarzenia pobierana równolegle (np. wydarzenie wielodniowe) - jedno zapytanie
+        self.address_flight = SingleFlight()
+        self.geocode = geocode
+        if geocoder is None and geocode:
+            # Domyślny serwis z cache'em SQLite; logic nie importuje api na poziomie modułu
+            from api.geocoding_service import GeocodingService
+            geocoder = GeocodingService(timeout=timeout)
+        self.geocoder = geocoder
+        self.max_workers = max(1, max_workers)
+        self.html_parser = html_parser or DEFAULT_HTML_PARSER
+        # URL strony dnia -> _DayState
+        self._day_states = MemoryCache(maxsize=tracked_days)
         self.session = requests.Session()
+        # Pula połączeń dopasowana do liczby wątków - inaczej urllib3 odrzuca nadmiarowe połączenia
+        adapter = HTTPAdapter(pool_maxsize=pool_size or self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (compatible; Waw4FreeParser/1.0)'
         })
         
-    def _get_page(self, url: str) -> Optional[BeautifulSoup]:
+    def _fetch(self, url: str, max_age: Optional[float] = None) -> Optional[str]:
         """
-        Pobiera i parsuje stronę z obsługą błędów
+        Pobiera treść strony, korzystając z cache'u stron jeśli jest dostępny
         
         Args:
             url: URL strony do pobrania
+            max_age: maksymalny wiek wpisu w cache'u (s)
             
         Returns:
-            BeautifulSoup object lub None w przypadku błędu
+            HTML strony lub None w przypadku błędu
         """
+        cached = self.page_cache.get(url) if self.page_cache else None
+        if cached and max_age is not None and cached.is_fresh(max_age):
+            self.page_cache.record_hit(cached)
+            return cached.body
+        
+        # Zapytanie warunkowe, jeśli serwer podał ETag / Last-Modified
+        headers = {}
+        if cached:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+        
+        page = _page_kind(url)
+        started = time.perf_counter()
         try:
-            response = self.session.get(url, timeout=self.timeout)
+            response = self.session.get(url, timeout=self.timeout, headers=headers)
+            PAGE_FETCH_SECONDS.observe(time.perf_counter() - started, page=page,
+                                       status=response.status_code)
+            if cached and response.status_code == 304:
+                self.page_cache.touch(url)
+                self.page_cache.record_hit(cached, revalidated=True)
+                return cached.body
             response.raise_for_status()
-            return BeautifulSoup(response.text, 'html.parser')
         except requests.RequestException as e:
+            kind = 'timeout' if isinstance(e, requests.Timeout) else 'error'
+            if not isinstance(e, requests.HTTPError):
+                PAGE_FETCH_SECONDS.observe(time.perf_counter() - started, page=page, status=kind)
+            UPSTREAM_ERRORS.inc(service='waw4free', kind=kind)
             logger.error(f"Błąd podczas pobierania {url}: {e}")
+            if cached:
+                logger.warning(f"Używam przeterminowanej kopii z cache'u: {url}")
+                return cached.body
+            return None
+        
+        if self.page_cache:
+            self.page_cache.record_miss()
+            self.page_cache.save(
+                url, response.text, len(response.content),
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+        return response.text
+    
+    def _get_page(self, url: str, max_age: Optional[float] = None,
+                  parse_only: Optional[SoupStrainer] = None) -> Optional[BeautifulSoup]:
+        """
+        Pobiera i parsuje stronę z obsługą błędów
+        
+        Args:
+            url: URL strony do pobrania
+            max_age: maksymalny wiek wpisu w cache'u stron (s)
+            parse_only: SoupStrainer - drzewo tylko z pasujących elementów
+            
+        Returns:
+            BeautifulSoup object lub None w przypadku błędu
+        """
+        html = self._fetch(url, max_age)
+        if html is None:
             return None
+        return self._parse(html, parse_only)
+    
+    def _parse(self, html: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+        page = 'detail' if parse_only is LOCATION_STRAINER else 'listing'
+        with PAGE_PARSE_SECONDS.time(page=page):
+            return BeautifulSoup(html, self.html_parser, parse_only=parse_only)
+    
+    @property
+    def _day_ttl(self) -> Optional[float]:
+        return self.page_cache.day_ttl if self.page_cache else None
+    
+    @property
+    def _detail_ttl(self) -> Optional[float]:
+        return self.page_cache.detail_ttl if self.page_cache else None
     
-    @lru_cache(maxsize=100)
-    def _get_address(self, url: str) -> str:
+    def _get_address(self, url: str, revalidate: bool = False) -> str:
         """
-        Pobiera adres z dedykowanej strony wydarzenia (z cache)
+        Pobiera adres z dedykowanej strony wydarzenia
+        (równoległe wywołania dla tego samego URL czekają na jedno pobranie)
         
         Args:
             url: URL strony wydarzenia
+            revalidate: pomiń świeżość kopii w cache'u stron (zapytanie warunkowe)
             
         Returns:
             Adres lub komunikat o braku adresu
         """
-        soup = self._get_page(url)
-        if not soup:
-            return "Brak adresu (błąd pobierania)"
+        max_age = 0 if revalidate else self._detail_ttl
+        return self.address_flight.do((url, revalidate), lambda: self._fetch_address(url, max_age))
+    
+    def _fetch_address(self, url: str, max_age: Optional[float] = None) -> str:
+        """Pobranie i sparsowanie adresu ze strony wydarzenia"""
+        soup = self._get_page(url, max_age=max_age, parse_only=LOCATION_STRAINER)
+        if soup is None:
+            return ADDRESS_FETCH_ERROR
         
         try:
             location_elem = soup.find(attrs={"itemprop": 'location'})
             if not location_elem:
-                return "Brak adresu"
-            
-            address = location_elem.text.strip()
-            address = address.replace("Warszawa", "").strip()
-            
-            # Usuń dzielnicę z adresu
-            for district in DISTRICTS:
-                address = address.replace(district, "").strip()
+                return NO_ADDRESS
             
-            address = address.replace(",", "").strip()
-            return address if address else "Brak adresu"
+            # Bez miasta, dzielnicy i przecinków (klucz cache'u liczy GeocodingService)
+            address = clean_address(location_elem.text)
+            return address if address else NO_ADDRESS
         except Exception as e:
             logger.error(f"Błąd parsowania adresu z {url}: {e}")
-            return "Brak adresu"
+            return NO_ADDRESS
     
     def _extract_district(self, text: str) -> Optional[str]:
         """Wyciąga nazwę dzielnicy z tekstu"""
@@ -135,32 +407,62 @@ class Waw4FreeParser:
                 return district
         return None
     
-    def geocode_addr(self,address: str) -> Optional[Location]:
-            """ 
-                Geokoding przy pomocy ArcGIS.
-                
-                Args:
-                    address: Adres do geokodowania
-
-                Returns:
-                    Tuple (latitude, longitude) lub None jeśli nie udało się geokodować
-            """
-            if not address or address == "Brak adresu":
-                return None
+    def geocode_addr(self, address: str) -> Optional[Tuple[float, float]]:
+        """
+        Geokoding przez wstrzyknięty serwis (domyślnie z cache'em)
+        
+        Args:
+            address: Adres do geokodowania
             
-            try:
-                geolocator = ArcGIS(timeout=self.timeout)
-                full_address = f"{address}, Warszawa, Polska"
-                location = geolocator.geocode(full_address)
-                
-                if location:
-                    return (location.latitude, location.longitude)
-                return None
-            except Exception as e:
-                logger.error(f"Błąd geokodowania adresu '{address}': {e}")
-                return None
+        Returns:
+            Tuple (latitude, longitude) lub None jeśli nie udało się geokodować
+        """
+        if not self.geocode or not address or address in NON_GEOCODABLE:
+            return None
+        
+        try:
+            return self.geocoder.geocode(address)
+        except Exception as e:
+            logger.error(f"Błąd geokodowania adresu '{address}': {e}")
+            return None
 
 
+    def _geocode_events(self, events: List[Union[EventBox, OtherBox]]) -> None:
+        """
+        Uzupełnia współrzędne wydarzeń jednym zbiorczym geokodowaniem
+        (geocode_many, jeśli serwis je udostępnia)
+        """
+        pending = [e for e in events if isinstance(e, EventBox) and not e.position]
+        if not self.geocode or not pending:
+            return
+        
+        addresses = [e.address for e in pending
+                     if e.address and e.address not in NON_GEOCODABLE]
+        if hasattr(self.geocoder, 'geocode_many'):
+            try:
+                coords = self.geocoder.geocode_many(addresses)
+            except Exception as e:
+                logger.error(f"Błąd geokodowania zbiorczego: {e}")
+                coords = {}
+        else:
+            # Bez zbiorczego API - pojedyncze zapytania równolegle, jak strony wydarzeń
+            unique = list(set(addresses))
+            coords = dict(zip(unique, self._map(self.geocode_addr, unique)))
+        
+        for event in pending:
+            event.position = coords.get(event.address)
+    
+    def forget_positions(self) -> bool:
+        """
+        Zapomina ustalone współrzędne (magazyn wydarzeń i stany dni) - po wyczyszczeniu
+        cache'u geokodowania kolejne pobranie dnia geokoduje wydarzenia od nowa
+        
+        Returns:
+            False, jeśli nie udało się wyczyścić magazynu
+        """
+        self._day_states.clear()
+        return self.event_store.clear_positions() if self.event_store else True
+    
     def _parse_date_interval(self, text: str) -> tuple[Optional[str], Optional[str]]:
         """
         Parsuje przedział dat (np. '12.01.2026 - 15.01.2026')
@@ -177,12 +479,14 @@ class Waw4FreeParser:
         except (ValueError, IndexError):
             return None, None
     
-    def _parse_box_data(self, box) -> Optional[Union[EventBox, OtherBox]]:
+    def _parse_box_data(self, box, revalidate: Container[str] = ()) -> Optional[Union[EventBox, OtherBox]]:
         """
         Parsuje pojedynczy box wydarzenia
         
         Args:
             box: BeautifulSoup element box
+            revalidate: permalinki, dla których adres jest pobierany od nowa
+                (zmieniony box - bez magazynu i bez świeżej kopii strony)
             
         Returns:
             EventBox, OtherBox lub None w przypadku błędu
@@ -252,11 +556,16 @@ class Waw4FreeParser:
                     single_date = parts[0].strip(",.;")
                     single_time = parts[1].strip(",.;")
             
-            # Adres (tylko jeśli potrzebny - można wyłączyć dla szybszego parsowania)
-            address = self._get_address(link)  # Zakomentuj jeśli zbyt wolne
-            # address = None  # Można pobrać później tylko dla wybranych eventów
-            # to geocode address 
-            geocoded_location = self.geocode_addr(address)
+            # Adres i współrzędne - z magazynu, jeśli wydarzenie było już widziane
+            # (i box się nie zmienił); brakujące współrzędne uzupełnia zbiorczo _geocode_events
+            refresh = link in revalidate
+            stored = self.event_store.get(link) if self.event_store and not refresh else None
+            if stored and stored['address'] != ADDRESS_FETCH_ERROR:
+                address = stored['address']
+                geocoded_location = stored['position']
+            else:
+                address = self._get_address(link, revalidate=refresh)
+                geocoded_location = None
             return EventBox(
                 title=title,
                 image=image,
@@ -286,24 +595,117 @@ class Waw4FreeParser:
             
         Returns:
             Lista obiektów EventBox/OtherBox
+            
+        Raises:
+            PageFetchError: strona dnia niedostępna (pusta lista oznacza dzień bez wydarzeń)
         """
-        url = f"{self.base_url}warszawa-wydarzenia-{year}-{month}-{day}"
-        soup = self._get_page(url)
+        return self.get_events_and_diff(day, month, year)[0]
+    
+    def get_events_and_diff(self, day: int, month: int, year: int) -> Tuple[List[Union[EventBox, OtherBox]], DayDiff]:
+        """
+        Pobiera wydarzenia z konkretnej daty wraz ze zmianami od poprzedniego pobrania
         
-        if not soup:
-            logger.error(f"Nie udało się pobrać strony dla {day}-{month}-{year}")
-            return []
+        Niezmieniona strona dnia nie jest parsowana, a przez _parse_box_data
+        (i pobieranie stron wydarzeń) przechodzą tylko nowe lub zmienione boxy.
         
-        # Sprawdź czy są wydarzenia
-        if soup.find(string="W tym dniu nie ma jeszcze żadnych wydarzeń."):
-            logger.info(f"Brak wydarzeń na {day}-{month}-{year}")
-            return []
+        Returns:
+            Tuple (lista EventBox/OtherBox, DayDiff względem poprzedniej listy)
+            
+        Raises:
+            PageFetchError: strona dnia niedostępna (poprzedni stan dnia zostaje)
+        """
+        url = f"{self.base_url}warszawa-wydarzenia-{year}-{month}-{day}"
+        previous = self._day_states.get(url)
+        html = self._fetch(url, max_age=self._day_ttl)
+        if html is None:
+            # Błąd przejściowy - poprzedni stan zostaje, a wywołujący nie zapamiętuje pustego dnia
+            raise PageFetchError(f"Nie udało się pobrać strony dla {day}-{month}-{year}")
         
-        if soup.find(string="Strona, której szukasz nie istnieje."):
+        state = None
+        # Sprawdź czy są wydarzenia (na surowym tekście - drzewo zawiera tylko boxy)
+        if NO_EVENTS_TEXT in html:
+            logger.info(f"Brak wydarzeń na {day}-{month}-{year}")
+        elif NOT_FOUND_TEXT in html:
             logger.warning(f"Nieprawidłowa data: {day}-{month}-{year}")
+        else:
+            state = self._update_day(html, previous)
+        
+        if state is None:
+            self._day_states.delete(url)
+            events = []
+        else:
+            self._day_states.set(url, state)
+            events = state.events
+        
+        diff = DayDiff.between(previous.events if previous else [], events)
+        for change in ('added', 'removed', 'changed'):
+            if getattr(diff, change):
+                EVENT_CHANGES.inc(len(getattr(diff, change)), change=change)
+        if diff:
+            logger.info(f"Zmiany {day}-{month}-{year}: nowe {len(diff.added)}, "
+                        f"usunięte {len(diff.removed)}, zmienione {len(diff.changed)}")
+        return list(events), diff
+    
+    @staticmethod
+    def _is_complete(event: Union[EventBox, OtherBox]) -> bool:
+        """Adres pobrany (błąd pobierania strony wydarzenia - box przetwarzany ponownie)"""
+        return not isinstance(event, EventBox) or event.address != ADDRESS_FETCH_ERROR
+    
+    def _geocode_retries(self, events: List[Union[EventBox, OtherBox]]) -> List[EventBox]:
+        """
+        Wydarzenia bez współrzędnych, które warto geokodować ponownie - geokoder
+        (retryable) nie ma dla adresu aktualnego "nie znaleziono", tylko np. błąd przejściowy
+        """
+        pending = [e for e in events if isinstance(e, EventBox) and e.position is None
+                   and e.address and e.address not in NON_GEOCODABLE]
+        if not self.geocode or not pending or not hasattr(self.geocoder, 'retryable'):
             return []
+        retry = self.geocoder.retryable({e.address for e in pending})
+        return [e for e in pending if e.address in retry]
+    
+    def _update_day(self, html: str, previous: Optional[_DayState]) -> _DayState:
+        """Stan strony dnia; z poprzedniego stanu brane są wydarzenia niezmienionych boxów"""
+        page_hash = _digest(html)
+        retry = self._geocode_retries(previous.events) if previous else []
+        if (previous and previous.page_hash == page_hash and not retry
+                and all(self._is_complete(event) for event in previous.events)):
+            DAY_PAGES.inc(result='unchanged')
+            return previous
+        DAY_PAGES.inc(result='parsed')
         
-        return self.parse_boxes(soup)
+        boxes = self._parse(html, BOX_STRAINER).find_all('div', class_="box")
+        hashes = [_digest(str(box)) for box in boxes]
+        known = previous.boxes if previous else {}
+        parsed = {h: known[h] for h in hashes if h in known and self._is_complete(known[h])}
+        
+        # Ponowne geokodowanie na kopiach - poprzednie obiekty są we wcześniejszych
+        # wynikach i w stanie, z którym liczony jest diff
+        retry_ids = {id(event) for event in retry}
+        regeocoded = []
+        for h, event in parsed.items():
+            if id(event) in retry_ids:
+                parsed[h] = copy.copy(event)
+                regeocoded.append(parsed[h])
+        if regeocoded:
+            self._geocode_events(regeocoded)
+            if self.event_store:
+                self.event_store.save_many(regeocoded)
+        
+        pending = {}
+        for h, box in zip(hashes, boxes):
+            if h not in parsed:
+                pending.setdefault(h, box)
+        # Zmieniony box wydarzenia widzianego w poprzednim stanie - adres mógł się
+        # zmienić, więc nie z magazynu ani ze świeżej kopii strony wydarzenia
+        seen = {event.plink for event in previous.events} if previous else set()
+        for h, event in zip(pending, self._parse_box_list(list(pending.values()), revalidate=seen)):
+            if event:
+                parsed[h] = event
+        
+        # Kolejność ze strony; nieudane boxy nie trafiają do stanu - następnym razem próba od nowa
+        events = [parsed[h] for h in hashes if h in parsed]
+        logger.info(f"Znaleziono {len(events)} wydarzeń (przetworzone boxy: {len(pending)})")
+        return _DayState(page_hash=page_hash, boxes=parsed, events=events)
     
     def parse_boxes(self, soup: BeautifulSoup) -> List[Union[EventBox, OtherBox]]:
         """
@@ -315,21 +717,42 @@ class Waw4FreeParser:
         Returns:
             Lista wydarzeń
         """
-        boxes = soup.find_all('div', class_="box")
-        events = []
-        
-        for box in boxes:
-            event = self._parse_box_data(box)
-            if event:
-                events.append(event)
-        
+        events = [event for event in self._parse_box_list(soup.find_all('div', class_="box")) if event]
         logger.info(f"Znaleziono {len(events)} wydarzeń")
         return events
     
+    def _parse_box_list(self, boxes: list, revalidate: Container[str] = ()) -> List[Optional[Union[EventBox, OtherBox]]]:
+        """
+        Parsuje boxy (z adresami i współrzędnymi) i zapisuje je w magazynie
+        
+        Args:
+            boxes: elementy box
+            revalidate: permalinki, dla których adres jest pobierany od nowa
+            
+        Returns:
+            Wynik dla każdego boxa, w tej samej kolejności (None - błąd parsowania)
+        """
+        # Strony wydarzeń równolegle; kolejność ze strony
+        parsed = self._map(functools.partial(self._parse_box_data, revalidate=revalidate), boxes)
+        
+        events = [event for event in parsed if event]
+        self._geocode_events(events)
+        
+        if self.event_store:
+            self.event_store.save_many(e for e in events if isinstance(e, EventBox))
+        return parsed
+    
+    def _map(self, fn, items: list) -> list:
+        """fn dla każdego elementu w puli max_workers wątków (map() zachowuje kolejność)"""
+        if self.max_workers > 1 and len(items) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+                return list(executor.map(fn, items))
+        return [fn(item) for item in items]
+    
     def get_recommended_events(self) -> List[Union[EventBox, OtherBox]]:
         """Pobiera polecane wydarzenia ze strony głównej"""
-        soup = self._get_page(self.base_url)
-        if not soup:
+        soup = self._get_page(self.base_url, max_age=self._day_ttl, parse_only=BOX_STRAINER)
+        if soup is None:
             return []
         return self.parse_boxes(soup)
     
@@ -344,15 +767,25 @@ class Waw4FreeParser:
         Returns:
             Lista wszystkich wydarzeń z zakresu
         """
-        all_events = []
+        return list(self.iter_events_range(start_date, end_date))
+    
+    def iter_events_range(self, start_date: date, end_date: date) -> Iterator[Union[EventBox, OtherBox]]:
+        """
+        Generator wydarzeń z zakresu dat (w pamięci tylko jeden dzień naraz)
+        
+        Args:
+            start_date: data początkowa
+            end_date: data końcowa
+        """
         current = start_date
         
         while current <= end_date:
-            events = self.get_events_from_date(current.day, current.month, current.year)
-            all_events.extend(events)
+            try:
+                yield from self.get_events_from_date(current.day, current.month, current.year)
+            except PageFetchError as e:
+                # Jeden niedostępny dzień nie przerywa zakresu
+                logger.error(str(e))
             current = date.fromordinal(current.toordinal() + 1)
-        
-        return all_events
     
     def enrich_with_addresses(self, events: List[EventBox]) -> List[EventBox]:
         """
@@ -365,48 +798,72 @@ class Waw4FreeParser:
             Lista wydarzeń z adresami i współrzędnymi
         """
         for event in events:
-            if isinstance(event, EventBox):
-                if not event.address:
-                    event.address = self._get_address(event.plink)
-                if not event.position and event.address:
-                    event.position = self.geocode_addr(event.address)
+            if isinstance(event, EventBox) and not event.address:
+                event.address = self._get_address(event.plink)
+        self._geocode_events(events)
         return events
     
-    def export_to_geojson(self, events: List[EventBox], filename: str):
-        """Eksportuje wydarzenia do pliku GeoJSON"""
-        features = []
-        
-        for event in events:
-            if isinstance(event, EventBox) and event.position:
-                feature = {
-                    "type": "Feature",
-                    "geometry": {
-                        "type": "Point",
-                        "coordinates": [event.position[1], event.position[0]]  # GeoJSON: [lon, lat]
-                    },
-                    "properties": {
-                        "title": event.title,
-                        "address": event.address,
-                        "district": event.district,
-                        "date": event.date,
-                        "start_date": event.start_date,
-                        "end_date": event.end_date,
-                        "time": event.time,
-                        "category": event.box_category,
-                        "image": event.image,
-                        "link": event.plink
-                    }
-                }
-                features.append(feature)
-        
-        geojson = {
-            "type": "FeatureCollection",
-            "features": features
+    @staticmethod
+    def _to_feature(event: EventBox) -> dict:
+        """Wydarzenie jako GeoJSON Feature"""
+        return {
+            "type": "Feature",
+            "geometry": {
+                "type": "Point",
+                "coordinates": [event.position[1], event.position[0]]  # GeoJSON: [lon, lat]
+            },
+            "properties": {
+                "title": event.title,
+                "address": event.address,
+                "district": event.district,
+                "date": event.date,
+                "start_date": event.start_date,
+                "end_date": event.end_date,
+                "time": event.time,
+                "category": event.box_category,
+                "image": event.image,
+                "link": event.plink
+            }
         }
+    
+    def export_to_geojson(self, events: Iterable[Union[EventBox, OtherBox]], filename: str,
+                          compact: bool = False, compress: Optional[bool] = None) -> int:
+        """
+        Eksportuje wydarzenia do pliku GeoJSON, zapisując je po jednym
+        (działa w stałej pamięci także dla generatora, np. iter_events_range)
+        
+        Args:
+            events: wydarzenia (lista lub dowolny iterator)
+            filename: plik wyjściowy
+            compact: bez wcięć i zbędnych spacji
+            compress: zapis gzip (domyślnie gdy nazwa kończy się na .gz)
+            
+        Returns:
+            Liczba zapisanych wydarzeń
+        """
+        if compress is None:
+            compress = filename.endswith('.gz')
+        opener = gzip.open if compress else open
+        
+        if compact:
+            head, sep, tail, empty = '{"type":"FeatureCollection","features":[', ',', ']}', '{"type":"FeatureCollection","features":[]}'
+            dump = lambda feature: json.dumps(feature, ensure_ascii=False, separators=(',', ':'))
+        else:
+            # Ten sam układ co json.dump(..., indent=2) całej kolekcji
+            head, sep, tail = '{\n  "type": "FeatureCollection",\n  "features": [\n', ',\n', '\n  ]\n}'
+            empty = '{\n  "type": "FeatureCollection",\n  "features": []\n}'
+            dump = lambda feature: '    ' + json.dumps(feature, ensure_ascii=False, indent=2).replace('\n', '\n    ')
+        
+        count = 0
+        with opener(filename, 'wt', encoding='utf-8') as f:
+            for event in events:
+                if isinstance(event, EventBox) and event.position:
+                    f.write((head if count == 0 else sep) + dump(self._to_feature(event)))
+                    count += 1
+            f.write(tail if count else empty)
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(geojson, f, ensure_ascii=False, indent=2)
-        logger.info(f"Wyeksportowano {len(features)} wydarzeń do {filename}")
+        logger.info(f"Wyeksportowano {count} wydarzeń do {filename}")
+        return count
 
 
 # Przykład użycia
@@ -431,6 +888,9 @@ if __name__ == "__main__":
     # # Przykład 4: Eksport do JSON
     # if events:
     #     parser.export_to_geojson(events, "wydarzenia_29_01_2026.geojson")
+    # # Zakres dat strumieniowo, skompresowany (stała pamięć)
+    # parser.export_to_geojson(parser.iter_events_range(today, week_later),
+    #                          "wydarzenia_tydzien.geojson.gz", compact=True)
     
     # Przykład 5: Dodanie adresów (opcjonalne, wolne)
     # events_with_addresses = parser.enrich_with_addresses(events[:5])  # Tylko pierwsze 5
\ No newline at end of file
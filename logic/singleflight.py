@@ -0,0 +1,89 @@
+"""
+Łączenie równoległych wywołań o ten sam klucz w jedno obliczenie (single-flight)
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Wersja dla wątków: kolejne wywołania czekają na wynik pierwszego"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Wykonaj fn() raz dla wszystkich równoległych wywołań z tym samym kluczem
+
+        Returns:
+            Wynik fn() (wyjątek jest przekazywany wszystkim czekającym)
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+            }
+
+
+class AsyncSingleFlight:
+    """Wersja dla asyncio: czekający współdzielą jedno zadanie"""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Wykonaj await factory() raz dla wszystkich równoległych wywołań z tym samym kluczem
+
+        Zadanie jest chronione przed anulowaniem - rozłączenie jednego klienta
+        nie przerywa obliczenia, na które czekają pozostali.
+        """
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            self.executions += 1
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def get_stats(self) -> dict:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
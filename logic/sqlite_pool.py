@@ -0,0 +1,55 @@
+"""
+Pula połączeń SQLite współdzielona przez cache'e (lokalizacje, strony)
+"""
+
+import queue
+import sqlite3
+from contextlib import contextmanager
+
+# Ustawienia połączeń: WAL pozwala czytać równolegle z zapisem,
+# synchronous=NORMAL jest bezpieczne w trybie WAL, cache_size w KiB (ujemne)
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class ConnectionPool:
+    """Długożyjące połączenia z jedną bazą - bez otwierania pliku przy każdym zapytaniu"""
+
+    def __init__(self, db_path: str, size: int = 8):
+        self.db_path = db_path
+        self._pool = queue.LifoQueue(maxsize=size)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Nowe połączenie z ustawionymi pragmami"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=64)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Połączenie z puli w ramach transakcji (commit lub rollback)"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self):
+        """Zamknij wszystkie połączenia z puli"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
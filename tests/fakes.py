@@ -0,0 +1,40 @@
+"""
+Atrapy usług zewnętrznych dla testów
+"""
+
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from geopy.exc import GeocoderTimedOut
+
+
+class CountingArcGIS:
+    """
+    Atrapa geopy ArcGIS licząca zapytania per adres; unknown - adresy, których
+    "nie ma", timeouts - adresy, dla których pierwsze zapytanie kończy się timeoutem
+    """
+
+    def __init__(self, latency: float = 0.02, unknown=(), timeouts=()):
+        self.latency = latency
+        self.unknown = set(unknown)
+        self.timeouts = set(timeouts)
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def geocode(self, query, **kwargs):
+        with self._lock:
+            self.calls[query] += 1
+        time.sleep(self.latency)
+        for address in list(self.timeouts):
+            if query.startswith(address):
+                self.timeouts.discard(address)
+                raise GeocoderTimedOut("atrapa: timeout")
+        if any(query.startswith(address) for address in self.unknown):
+            return None
+        return SimpleNamespace(latitude=52.2 + len(query) * 1e-4, longitude=21.0)
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
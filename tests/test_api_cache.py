@@ -0,0 +1,133 @@
+"""
+Cache'e odpowiedzi API per data (bez HTTP i bez waw4free - wydarzenia podstawiane)
+"""
+
+import importlib
+import json
+import os
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from logic.parser_update import DayDiff, EventBox, PageFetchError
+
+DAY = date(2026, 1, 29)
+
+
+@pytest.fixture(scope="module")
+def main(tmp_path_factory):
+    # api.main przy imporcie otwiera bazy SQLite w katalogu roboczym
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("api"))
+    try:
+        yield importlib.import_module("api.main")
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture(autouse=True)
+def clean(main):
+    yield
+    for cache in (main.day_events_cache, main.geojson_cache, main.spatial_index_cache,
+                  main.cluster_cache, main.facet_cache, main.tile_cache):
+        cache.clear()
+
+
+def event(i: int, district: str = "Mokotów", position=None) -> EventBox:
+    return EventBox(title=f"Wydarzenie {i}", image="", district=district,
+                    address=f"ul. Puławska {i}", plink=f"https://waw4free.pl/wydarzenie-{i}-test",
+                    box_category=["koncert"], date="29.01.2026", time="18:00",
+                    position=position or (52.2 + i * 0.01, 21.0))
+
+
+def test_build_interrupted_by_invalidation_is_not_cached(main, monkeypatch):
+    def load_during_refresh(event_date):
+        # Budowa odczytała stare wydarzenia, a dzień został w tym czasie odświeżony
+        main.invalidate_views(event_date)
+        return [event(1)]
+
+    monkeypatch.setattr(main, "load_day_events", load_during_refresh)
+
+    assert main.build_day_geojson(DAY) is not None
+    assert main.load_day_index(DAY) is not None
+    assert main.geojson_cache.get(DAY) is None
+    assert main.spatial_index_cache.get(DAY) is None
+
+
+def test_build_without_invalidation_is_cached(main, monkeypatch):
+    monkeypatch.setattr(main, "load_day_events", lambda event_date: [event(1)])
+
+    built = main.build_day_geojson(DAY)
+
+    assert main.geojson_cache.get(DAY) is built
+
+
+def test_filtered_features_keep_page_order(main, monkeypatch):
+    # Na przemian w dwóch komórkach siatki indeksu (indeks grupuje je per komórka)
+    events = [event(i, district="Wola" if i % 3 else "Mokotów",
+                    position=(52.2 if i % 2 else 52.3, 21.0 + i * 1e-4)) for i in range(9)]
+    monkeypatch.setattr(main, "load_day_events", lambda event_date: events)
+
+    facets = main.load_day_facets(DAY)
+    selected = facets.select(facets.mask(district=["Mokotów"]))
+
+    expected = [e.plink for e in events if e.district == "Mokotów"]
+    assert [f["properties"]["link"] for f in selected] == expected
+
+
+@pytest.fixture
+def upstream_down_on(main, monkeypatch):
+    """Parser z niedostępną stroną dla podanych dat (pozostałe dni: jedno wydarzenie)"""
+    down = set()
+
+    def get_events_and_diff(day, month, year):
+        if date(year, month, day) in down:
+            raise PageFetchError(f"Nie udało się pobrać strony dla {day}-{month}-{year}")
+        return [event(day, position=(52.2, 21.0 + day * 1e-3))], DayDiff()
+
+    monkeypatch.setattr(main.parser, "get_events_and_diff", get_events_and_diff)
+    return down
+
+
+def test_unavailable_day_is_skipped_in_ranges(main, upstream_down_on):
+    upstream_down_on.add(date(2026, 1, 30))
+    client = TestClient(main.app)
+    query = "start_day=29&start_month=1&start_year=2026&end_day=31&end_month=1&end_year=2026"
+
+    response = client.get(f"/api/events-range?{query}")
+    assert response.status_code == 200
+    assert response.json()["total"] == 2
+    assert response.json()["unavailable_dates"] == ["2026-01-30"]
+
+    lines = [json.loads(line) for line in client.get(f"/api/events-range?{query}&format=ndjson").text.splitlines()]
+    assert {"error": main.DAY_UNAVAILABLE, "date": "2026-01-30"} in lines
+    assert len(lines) == 3
+
+    collection = client.get(f"/api/events-range?{query}&format=geojson").json()
+    assert len(collection["features"]) == 2
+    assert collection["unavailable_dates"] == ["2026-01-30"]
+
+    bbox = client.get("/api/events/bbox?min_lat=52&min_lon=20.9&max_lat=53&max_lon=21.1"
+                      "&day=29&month=1&year=2026&end_day=31")
+    assert bbox.status_code == 200 and len(bbox.json()["features"]) == 2
+
+
+def test_unavailable_single_day_is_a_gateway_error(main, upstream_down_on):
+    upstream_down_on.add(DAY)
+    client = TestClient(main.app)
+
+    assert client.get("/api/events?day=29&month=1&year=2026").status_code == 502
+    assert client.get("/api/events/geojson?day=29&month=1&year=2026").status_code == 502
+    assert client.get("/api/events/bbox?min_lat=52&min_lon=20.9&max_lat=53&max_lon=21.1"
+                      "&day=29&month=1&year=2026").status_code == 502
+
+
+def test_events_range_is_limited_to_max_query_days(main, upstream_down_on):
+    client = TestClient(main.app)
+
+    response = client.get("/api/events-range?start_day=1&start_month=1&start_year=2026"
+                          "&end_day=1&end_month=1&end_year=2030")
+
+    assert response.status_code == 400
+    assert str(main.MAX_QUERY_DAYS) in response.json()["detail"]
@@ -0,0 +1,29 @@
+"""
+EventBox: linki trzymane względem BASE_URL, a na zewnątrz pełne
+"""
+
+import pytest
+
+from logic.parser_update import BASE_URL, EventBox, OtherBox
+
+
+@pytest.mark.parametrize("link", [
+    f"{BASE_URL}wydarzenie-5-test",
+    f"{BASE_URL}wydarzenie-5?from=https://x.pl",
+    "http://127.0.0.1:8000/wydarzenie-5-test",
+    "",
+])
+def test_links_round_trip(link):
+    event = EventBox(title="t", image=link, district="Mokotów", address=None, plink=link)
+    other = OtherBox(title="t", image=link, info="", plink=link)
+
+    assert event.plink == event.image == link
+    assert other.plink == other.image == link
+    assert event.to_dict()["plink"] == link
+
+
+def test_waw4free_links_are_stored_relative():
+    event = EventBox(title="t", image="", district="Mokotów", address=None,
+                     plink=f"{BASE_URL}wydarzenie-5-test")
+
+    assert event._link == "wydarzenie-5-test"
@@ -0,0 +1,107 @@
+"""
+Geokodowanie równoległe: każdy adres trafia do ArcGIS najwyżej raz na proces
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from bs4 import BeautifulSoup
+
+from api.geocoding_service import GeocodingService
+from logic.parser_update import Waw4FreeParser
+from tests.fakes import CountingArcGIS
+
+VENUES = [f"ul. Marszałkowska {n}" for n in range(1, 21)]
+
+
+@pytest.fixture
+def arcgis():
+    return CountingArcGIS()
+
+
+@pytest.fixture
+def service(tmp_path, arcgis):
+    service = GeocodingService(cache_db=str(tmp_path / "locations.db"), min_delay_seconds=0)
+    service.geocoder = arcgis
+    yield service
+    service.cache.close()
+
+
+def run_concurrently(threads: int, fn):
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return [f.result() for f in [executor.submit(fn) for _ in range(threads)]]
+
+
+def test_concurrent_geocode_many_queries_each_address_once(service, arcgis):
+    results = run_concurrently(4, lambda: service.geocode_many(VENUES))
+
+    assert arcgis.total == len(VENUES)
+    assert all(calls == 1 for calls in arcgis.calls.values())
+    assert all(result == results[0] for result in results)
+    assert all(results[0][address] is not None for address in VENUES)
+
+
+def test_geocode_and_geocode_many_share_in_flight_queries(service, arcgis):
+    def mixed():
+        service.geocode_many(VENUES[:10])
+        for address in VENUES:
+            service.geocode(address)
+
+    run_concurrently(4, mixed)
+
+    assert arcgis.total == len(VENUES)
+
+
+def test_cold_lookups_count_one_memory_miss_per_address(service):
+    service.geocode_many(VENUES[:8])
+    service.geocode(VENUES[8])
+
+    assert service.memory.get_stats()["misses"] == 9
+    assert service.sqlite_misses == 9
+
+
+def test_results_are_persisted_in_sqlite(service, arcgis):
+    first = service.geocode_many(VENUES)
+    service.memory.clear()
+
+    assert service.geocode_many(VENUES) == first
+    assert arcgis.total == len(VENUES)
+
+
+def test_not_found_is_queried_once(tmp_path):
+    arcgis = CountingArcGIS(unknown=["ul. Nieistniejąca 1"])
+    service = GeocodingService(cache_db=str(tmp_path / "locations.db"), min_delay_seconds=0)
+    service.geocoder = arcgis
+
+    run_concurrently(4, lambda: service.geocode_many(["ul. Nieistniejąca 1", VENUES[0]]))
+    service.memory.clear()
+    assert service.geocode("ul. Nieistniejąca 1") is None
+
+    assert arcgis.total == 2
+    service.cache.close()
+
+
+def render_day(boxes: int) -> str:
+    """Strona dnia: boxy wydarzeń w kilku miejscach (VENUES powtarzają się)"""
+    return "".join(f"""
+<div class="box">
+  <a href="wydarzenie-{i}-test" title="Wydarzenie {i}"></a>
+  <div class="box-data">29.01.2026, 18:00, Mokotów</div>
+  <div class="box-category">koncert</div>
+</div>""" for i in range(boxes))
+
+
+def test_threaded_parse_boxes_geocodes_each_venue_once(service, arcgis):
+    parser = Waw4FreeParser(max_workers=8, geocoder=service)
+    # Adres ze strony wydarzenia bez HTTP - 60 wydarzeń w 20 miejscach
+    parser._fetch_address = lambda url, max_age=None: VENUES[int(url.split("-")[-2]) % len(VENUES)]
+
+    def parse_day():
+        soup = BeautifulSoup(render_day(60), "html.parser")
+        return parser.parse_boxes(soup)
+
+    # Kilka dni równocześnie (zakres dat, prefetch)
+    days = run_concurrently(3, parse_day)
+
+    assert arcgis.total == len(VENUES)
+    assert all(event.position is not None for events in days for event in events)
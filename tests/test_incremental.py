@@ -0,0 +1,146 @@
+"""
+Przyrostowe pobieranie dnia: niezmienione strony i boxy nie są przetwarzane ponownie
+"""
+
+from collections import Counter
+
+import pytest
+
+from api.geocoding_service import GeocodingService
+from logic.event_store import EventStore
+from logic.parser_update import PageFetchError, Waw4FreeParser
+from tests.fakes import CountingArcGIS
+
+DAY = (29, 1, 2026)
+UNKNOWN_STREET = "ul. Nieistniejąca 7"
+
+
+def render_day(titles) -> str:
+    return "<html><body>" + "".join(f"""
+<div class="box">
+  <a href="wydarzenie-{i}-test" title="{title}"></a>
+  <div class="box-data">29.01.2026, 18:00, Mokotów</div>
+  <div class="box-category">koncert</div>
+</div>""" for i, title in enumerate(titles)) + "</body></html>"
+
+
+class FakeSite:
+    """
+    Strona dnia i strony wydarzeń bez HTTP (liczone pobrania stron wydarzeń;
+    świeża kopia strony wydarzenia, jak w cache'u stron, nie jest pobierana ponownie)
+    """
+
+    def __init__(self, titles):
+        self.titles = list(titles)
+        self.addresses = {}
+        self.available = True
+        self.detail_fetches = Counter()
+        self._pages = {}
+
+    def fetch(self, url, max_age=None):
+        return render_day(self.titles) if self.available else None
+
+    def address(self, url, max_age=None):
+        if max_age and url in self._pages:
+            return self._pages[url]
+        self.detail_fetches[url] += 1
+        idx = int(url.split("-")[-2])
+        default = UNKNOWN_STREET if idx == 0 else f"ul. Puławska {idx}"
+        self._pages[url] = self.addresses.get(idx, default)
+        return self._pages[url]
+
+
+def make_parser(tmp_path, site, arcgis):
+    geocoder = GeocodingService(cache_db=str(tmp_path / "locations.db"), min_delay_seconds=0,
+                                error_retry_base=0)
+    geocoder.geocoder = arcgis
+    parser = Waw4FreeParser(max_workers=4, geocoder=geocoder,
+                            event_store=EventStore(str(tmp_path / "events.db")))
+    parser._fetch = site.fetch
+    parser._fetch_address = site.address
+    return parser
+
+
+@pytest.fixture
+def site():
+    return FakeSite([f"Wydarzenie {i}" for i in range(9)])
+
+
+def test_ungeocodable_event_does_not_force_reparse(tmp_path, site):
+    arcgis = CountingArcGIS(latency=0, unknown=[UNKNOWN_STREET])
+    parser = make_parser(tmp_path, site, arcgis)
+    first, diff = parser.get_events_and_diff(*DAY)
+    assert len(diff.added) == 9 and first[0].position is None
+
+    for _ in range(3):
+        events, diff = parser.get_events_and_diff(*DAY)
+        assert not diff
+        assert events == first
+
+    assert sum(site.detail_fetches.values()) == 9
+    assert arcgis.total == 9
+
+
+def test_transient_geocode_error_is_retried_without_refetching_details(tmp_path, site):
+    arcgis = CountingArcGIS(latency=0, timeouts=["ul. Puławska 3"])
+    parser = make_parser(tmp_path, site, arcgis)
+    first, _ = parser.get_events_and_diff(*DAY)
+    assert first[3].position is None
+
+    events, diff = parser.get_events_and_diff(*DAY)
+
+    assert diff.changed == [first[3].plink]
+    assert events[3].position is not None
+    # Poprzedni wynik nie jest modyfikowany w miejscu
+    assert first[3].position is None
+    assert sum(site.detail_fetches.values()) == 9
+
+
+def test_changed_box_is_the_only_one_processed(tmp_path, site):
+    parser = make_parser(tmp_path, site, CountingArcGIS(latency=0))
+    parser.get_events_and_diff(*DAY)
+
+    site.titles[4] = "Wydarzenie 4 (nowe miejsce)"
+    site.addresses[4] = "ul. Marszałkowska 4"
+    site.titles.append("Wydarzenie 9")
+    events, diff = parser.get_events_and_diff(*DAY)
+
+    assert diff.changed == [events[4].plink]
+    assert diff.added == [events[9].plink]
+    assert not diff.removed
+    # Zmieniony box: adres nie z magazynu ani ze świeżej kopii strony wydarzenia
+    assert events[4].address == "ul. Marszałkowska 4"
+    assert parser.event_store.get(events[4].plink)["address"] == "ul. Marszałkowska 4"
+    assert site.detail_fetches[events[4].plink] == 2
+    assert sum(site.detail_fetches.values()) == 11
+
+
+def test_fetch_failure_keeps_previous_state(tmp_path, site):
+    parser = make_parser(tmp_path, site, CountingArcGIS(latency=0))
+    first, _ = parser.get_events_and_diff(*DAY)
+
+    site.available = False
+    with pytest.raises(PageFetchError):
+        parser.get_events_and_diff(*DAY)
+
+    site.available = True
+    events, diff = parser.get_events_and_diff(*DAY)
+    assert not diff
+    assert events == first
+
+
+def test_forgotten_positions_are_geocoded_again(tmp_path, site):
+    arcgis = CountingArcGIS(latency=0)
+    parser = make_parser(tmp_path, site, arcgis)
+    first, _ = parser.get_events_and_diff(*DAY)
+
+    # Jak /api/cache/clear: cache geokodowania i współrzędne przy wydarzeniach
+    assert parser.geocoder.clear()
+    assert parser.forget_positions()
+    assert parser.event_store.get(first[1].plink)["position"] is None
+    events, _ = parser.get_events_and_diff(*DAY)
+
+    assert events == first
+    assert arcgis.total == 18
+    # Adresy nadal z magazynu
+    assert sum(site.detail_fetches.values()) == 9